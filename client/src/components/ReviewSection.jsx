@@ -12,7 +12,7 @@ function ReviewSection({productId=null, serviceId = null}) {
             if (!r.ok) throw new Error("Could not load reviews.")
             return r.json()    
         })
-        .then(data => setReviews(data))
+        .then(data => setReviews(data.items))
         .catch(error => console.error(error))
     }, [productId, serviceId])
 
@@ -21,9 +21,9 @@ function ReviewSection({productId=null, serviceId = null}) {
         e.preventDefault();
         const newReview = {
             comment, 
-            rating,
-            productId: productId,
-            serviceId: serviceId,
+            rating: Number(rating),
+            product_id: productId,
+            service_id: serviceId,
             user_id: 1  /*to be provided in authSlice/user state*/
         }
 
@@ -34,7 +34,7 @@ function ReviewSection({productId=null, serviceId = null}) {
         })
         .then(r => r.json())
         .then(savedReview => {
-            setReviews([...reviews, savedReview])
+            setReviews([savedReview, ...reviews])
             setComment("")
         })
         .catch(err => alert(err.message))
@@ -1,13 +1,24 @@
 import {createSlice, createAsyncThunk} from "reduxjs/toolkit"
 
-export const fetchProducts = createAsyncThunk("products/fetchAll", (categoryId = null) => {
-    const url = categoryId ? `/products?category_id=${categoryId}` : '/products'
-    return fetch(url)
+// The list is keyset paginated: each page comes with the next_cursor to pass back for the next one
+const fetchProductsPage = (categoryId, cursor) => {
+    const params = new URLSearchParams()
+    if (categoryId) params.set("category_id", categoryId)
+    if (cursor) params.set("cursor", cursor)
+    const query = params.toString()
+    return fetch(query ? `/products?${query}` : '/products')
     .then((r) => {
         if(!r.ok) throw new Error("Failed to fetch products")
         return r.json()
     })
-    .then (data => data)    
+}
+
+export const fetchProducts = createAsyncThunk("products/fetchAll", (categoryId = null) => {
+    return fetchProductsPage(categoryId, null).then(data => ({...data, categoryId}))
+})
+
+export const fetchMoreProducts = createAsyncThunk("products/fetchMore", ({categoryId = null, cursor}) => {
+    return fetchProductsPage(categoryId, cursor)
 })
 
 
@@ -22,13 +33,25 @@ export const fetchProductById = createAsyncThunk("products/fetchById", (id) => {
 
 const productSlice = createSlice({
     name: 'products',
-    initialState: {items: [], selectedProduct: null, loading: false, error: null},
+    initialState: {items: [], nextCursor: null, categoryId: null, selectedProduct: null, loading: false, loadingMore: false, error: null},
     extraReducers: (builder) => {
         builder
         .addCase(fetchProducts.pending, (state) => {state.loading = true})
         .addCase(fetchProducts.fulfilled, (state, action) => {
             state.loading = false
-            state.items = action.payload
+            state.items = action.payload.items
+            state.nextCursor = action.payload.next_cursor
+            state.categoryId = action.payload.categoryId
+        })
+        .addCase(fetchMoreProducts.pending, (state) => {state.loadingMore = true})
+        .addCase(fetchMoreProducts.fulfilled, (state, action) => {
+            state.loadingMore = false
+            state.items = state.items.concat(action.payload.items)
+            state.nextCursor = action.payload.next_cursor
+        })
+        .addCase(fetchMoreProducts.rejected, (state, action) => {
+            state.loadingMore = false
+            state.error = action.error.message
         })
         .addCase(fetchProductById.fulfilled, (state, action) => {
             state.selectedProduct =action.payload
@@ -1,14 +1,25 @@
 import {createSlice, createAsyncThunk} from "reduxjs/toolkit"
 
 
-export const fetchServices = createAsyncThunk("services/fetchAll", (categoryId = null) => {
-    const url = categoryId ? `/services?category_id=${categoryId}` : '/services'
-    return fetch(url)
+// The list is keyset paginated: each page comes with the next_cursor to pass back for the next one
+const fetchServicesPage = (categoryId, cursor) => {
+    const params = new URLSearchParams()
+    if (categoryId) params.set("category_id", categoryId)
+    if (cursor) params.set("cursor", cursor)
+    const query = params.toString()
+    return fetch(query ? `/services?${query}` : '/services')
     .then((r) => {
         if(!r.ok) throw new Error("Failed to fetch services")
         return r.json()
     })
-    .then (data => data)    
+}
+
+export const fetchServices = createAsyncThunk("services/fetchAll", (categoryId = null) => {
+    return fetchServicesPage(categoryId, null).then(data => ({...data, categoryId}))
+})
+
+export const fetchMoreServices = createAsyncThunk("services/fetchMore", ({categoryId = null, cursor}) => {
+    return fetchServicesPage(categoryId, cursor)
 })
 
 
@@ -23,7 +34,7 @@ export const fetchServiceById = createAsyncThunk("services/fetchById", (id) => {
 
 const serviceSlice = createSlice({
     name: 'services',
-    initialState: {list: [], selectedService: null, loading: false, error: null},
+    initialState: {items: [], nextCursor: null, categoryId: null, selectedService: null, loading: false, loadingMore: false, error: null},
     reducers: {
         clearSelectedService: (state) => {
             state.selectedService = null
@@ -34,7 +45,19 @@ const serviceSlice = createSlice({
         .addCase(fetchServices.pending, (state) => {state.loading = true})
         .addCase(fetchServices.fulfilled, (state, action) => {
             state.loading = false
-            state.items = action.payload
+            state.items = action.payload.items
+            state.nextCursor = action.payload.next_cursor
+            state.categoryId = action.payload.categoryId
+        })
+        .addCase(fetchMoreServices.pending, (state) => {state.loadingMore = true})
+        .addCase(fetchMoreServices.fulfilled, (state, action) => {
+            state.loadingMore = false
+            state.items = state.items.concat(action.payload.items)
+            state.nextCursor = action.payload.next_cursor
+        })
+        .addCase(fetchMoreServices.rejected, (state, action) => {
+            state.loadingMore = false
+            state.error = action.error.message
         })
         .addCase(fetchServiceById.fulfilled, (state, action) => {
             state.selectedProduct =action.payload
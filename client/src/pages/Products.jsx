@@ -1,19 +1,20 @@
 import { useEffect } from "react";
 import {useDispatch, useSelector} from "react-redux"
 
-import { fetchProducts } from "../features/productSlice";
+import { fetchProducts, fetchMoreProducts } from "../features/productSlice";
 import CategoryFilter from "../components/CategoryFilter"
 import ItemCard from "../components/ItemCard";
 
 function Products () {
     const dispatch = useDispatch()
-    const {items, loading} = useSelector(state => state.Products)
+    const {items, nextCursor, categoryId, loading, loadingMore} = useSelector(state => state.Products)
 
     useEffect (() => {
         dispatch(fetchProducts())
     }, [dispatch])
 
     const handleFilter = (id) => dispatch(fetchProducts(id))
+    const handleLoadMore = () => dispatch(fetchMoreProducts({categoryId, cursor: nextCursor}))
     return (
         <div >
             <CategoryFilter type="Product" onSelectedCategory={handleFilter}/>
@@ -22,6 +23,11 @@ function Products () {
                     {items.map(product => <ItemCard key={product.id} item={product} type="product"/>)}
                 </div>    
             )}
+            {!loading && nextCursor && (
+                <button onClick={handleLoadMore} disabled={loadingMore}>
+                    {loadingMore ? "Loading..." : "Load more"}
+                </button>
+            )}
         </div>
     )
 }
@@ -1,26 +1,32 @@
 import { useEffect } from "react";
 import {useDispatch, useSelector} from "react-redux"
 
-import { fetchServices } from "../features/productSlice";
+import { fetchServices, fetchMoreServices } from "../features/serviceSlice";
 import CategoryFilter from "../components/CategoryFilter"
 import ItemCard from "../components/ItemCard";
 
 function Services () {
     const dispatch = useDispatch()
-    const {list, loading} = useSelector(state => state.Services)
+    const {items, nextCursor, categoryId, loading, loadingMore} = useSelector(state => state.Services)
 
     useEffect(() => {
         dispatch(fetchServices())
     }, [dispatch])
 
     const handleFilter = (id) => dispatch(fetchServices(id))
+    const handleLoadMore = () => dispatch(fetchMoreServices({categoryId, cursor: nextCursor}))
 
     return (
         <div>
             <CategoryFilter type="Service" onSelectCategory={handleFilter}/>
             <div className="item-grid">
-                {list.map(service => <ItemCard key={service.id} item={service} type={service}/>)}          
+                {items.map(service => <ItemCard key={service.id} item={service} type={service}/>)}          
             </div>
+            {!loading && nextCursor && (
+                <button onClick={handleLoadMore} disabled={loadingMore}>
+                    {loadingMore ? "Loading..." : "Load more"}
+                </button>
+            )}
         </div>
     )
 }
@@ -1,5 +1,5 @@
 import { useParams } from "react-router-dom";
-import { useEffect } from "react";
+import { useEffect, useState } from "react";
 import { useDispatch, useSelector } from "react-redux";
 
 import { fetchProductById } from "../features/productSlice";
@@ -9,10 +9,21 @@ function ProductDetail () {
     const {id} = useParams()
     const dispatch = useDispatch()
     const product = useSelector(state => state.products.selectedProduct);
+    const [cart, setCart] = useState(null)
 
     useEffect(() => {
         dispatch(fetchProductById(id))
     }, [id, dispatch])
+
+    const handleAddToCart = () => {
+        fetch("/cart-items", {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({product_id: product.id, quantity: 1})
+        })
+        .then(r => r.ok ? r.json() : null)
+        .then(summary => summary && setCart(summary))
+    }
     if (!product) return <p>Loading...</p>
 
     return (
@@ -22,7 +33,8 @@ function ProductDetail () {
             <p>{product.description}</p>
             <h2>Price: {product.price}</h2>
             <p>In Stock: {product.stock_quantity}</p>
-            <button disabled={product.stock_quantity <= 0}>Add to Cart</button>
+            <button disabled={product.stock_quantity <= 0} onClick={handleAddToCart}>Add to Cart</button>
+            {cart && <p>Cart: {cart.item_count} items, Ksh. {cart.items_total}</p>}
             <ReviewSection productId={product.id}/>
         </div>
     )
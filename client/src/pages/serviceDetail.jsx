@@ -9,8 +9,12 @@ function ServiceDetail(){
     const dispatch = useDispatch()
     const service = useSelector(state => state.services.selectedService);
     const [date, setDate] = useState("")
+    const [slots, setSlots] = useState([])
     useEffect(() => {
         dispatch(fetchServiceById(id))
+        fetch(`/services/${id}/slots`)
+        .then(r => r.ok ? r.json() : [])
+        .then(setSlots)
     }, [id, dispatch])
 
     const handleBooking =() => {
@@ -27,7 +31,14 @@ function ServiceDetail(){
             <h1>{service.name}</h1>
             <p>{service.description}</p>
             <h3>Base Price: Ksh. {service.base_price}</h3>
-            <input type="datetime-local" onChange={e => setDate(e.target.value)} />
+            <select value={date} onChange={e => setDate(e.target.value)}>
+                <option value="">Pick a time</option>
+                {slots.map(slot => (
+                    <option key={slot.starts_at} value={slot.starts_at}>
+                        {new Date(slot.starts_at).toLocaleString()} ({slot.available} left)
+                    </option>
+                ))}
+            </select>
             <ReviewSection serviceId={service.id}/>
             <button onClick={handleBooking}>Confirm Booking</button>
         </div>
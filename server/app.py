@@ -6,22 +6,43 @@ from config import app, db, api
 
 from datetime import datetime
 
-from models import (Product, CartItem, Cart, DeliveryZone, 
+from models import (Product, Cart, DeliveryZone, 
         InventoryAlert, Service, Payment, Order, 
         OrderItem, Review, User, Role, OrderStatusHistory,
          Appointment, Category
     )
 
+from listing import list_catalog, keyset_page, int_arg, bool_arg, local_datetime, ListingError
+from loaders import eager
+from serializers import dump, dump_all
+from cache import cached, catalog_cache
+from http_cache import conditional
+from stock import InsufficientStock
+from orders import place_order
+from principal import current_principal, invalidate_principal
+from hashing import hasher, HasherBusy, needs_rehash
+from ratings import record_review
+from search import search_catalog
+from payment_callbacks import enqueue_callback, InvalidCallback
+from exports import export_response
+from dashboard import dashboard_summary
+from rollups import REPORTS
+from slots import book_slot, open_slots, SlotUnavailable
+from metrics import metrics_response
+from catalog_import import import_catalog, detect_format, text_stream, CatalogImportError
+from carts import parse_lines, parse_product_ids, CartError, UnknownDeliveryZone
+from cart_store import cart_store, cart_key, merge_guest_cart
+
+import hmac
 from functools import wraps
 
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = session.get('user_id')
-        if not user_id:
+        if not session.get('user_id'):
             return {"error": "Unauthorized"}, 401
-        user = User.query.get(user_id)
-        if not user or user.role.name != "Admin":
+        principal = current_principal()
+        if not principal or principal.role_name != "Admin":
             return {"error": "Admin access required"}, 403
         return f(*args, **kwargs)
     return decorated_function
@@ -33,6 +54,8 @@ class Signup(Resource):
         data = request.get_json()
         if User.query.filter_by(email=data.get("email")).first():
             return {"error": "Email already registered"}, 400
+        #hand the connection back to the pool while bcrypt runs
+        db.session.rollback()
         try:
             new_user = User(
                 username=data.get('username'),
@@ -49,8 +72,12 @@ class Signup(Resource):
             db.session.commit()
 
             session['user_id'] = new_user.id
+            merge_guest_cart(new_user.id)
 
             return new_user.to_dict(), 201
+        except HasherBusy as e:
+            db.session.rollback()
+            return {"error": str(e)}, 503, {"Retry-After": "1"}
         except Exception as e:
             db.session.rollback()
             return {"errors": [str(e)]}, 422
@@ -60,15 +87,28 @@ class Login(Resource):
     def post(self):
         data = request.get_json()
         user = User.query.filter_by(username=data.get('username')).first()
-        if user and user.check_password(data.get('password')):
-            session['user_id'] = user.id
-            return user.to_dict(), 200
+        password_hash = user._password_hash if user else None
+        #hand the connection back to the pool while bcrypt runs
+        db.session.rollback()
+        try:
+            if password_hash and hasher.verify(password_hash, data.get('password')):
+                #upgrade hashes made with an older BCRYPT_LOG_ROUNDS
+                if needs_rehash(password_hash):
+                    user.password = data.get('password')
+                    db.session.commit()
+                session['user_id'] = user.id
+                merge_guest_cart(user.id)
+                return user.to_dict(), 200
+        except HasherBusy as e:
+            return {"error": str(e)}, 503, {"Retry-After": "1"}
 
         return {"error": "Invalid username or password"}, 401
 
 
 class Logout(Resource):
     def delete(self):
+        if session.get("user_id"):
+            invalidate_principal(session["user_id"])
         session["user_id"] = None
         return {}, 204
 
@@ -77,9 +117,10 @@ class CheckSession(Resource):
     def get(self):
         user_id = session.get('user_id') or request.cookies.get('user_id')
         if user_id:
-            user = User.query.get(user_id)
-            return user.to_dict(), 200
-            
+            user = db.session.get(User, user_id, options=eager(User))
+            if user:
+                return user.to_dict(), 200
+
         return {"error": "Not logged in"}, 401
 
 
@@ -88,7 +129,7 @@ class CheckSession(Resource):
 class UserList(Resource):
     @admin_required
     def get(self):
-        users = User.query.all()
+        users = User.query.options(*eager(User)).all()
         return [{
             "id": u.id,
             "username": u.username,
@@ -99,6 +140,8 @@ class UserList(Resource):
 
 
 class CategoryList(Resource):
+    @conditional("categories")
+    @cached("categories")
     def get(self):
         categories = Category.query.all()
         return [c.to_dict() for c in categories], 200
@@ -118,14 +161,24 @@ class CategoryList(Resource):
 
 
 class ProductList(Resource):
+    @conditional("products", "categories", "inventory_alerts")
+    @cached("products")
     def get(self):
-        products = Product.query.all()
-        return [p.to_dict() for p in products], 200
+        try:
+            products, next_cursor = list_catalog(
+                Product, request.args,
+                price_column=Product.price,
+                stock_column=Product.stock_quantity
+            )
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        return {"items": dump_all(products), "next_cursor": next_cursor}, 200
 
     @admin_required
     def post(self):
         data = request.get_json()
         new_product = Product(
+            sku=data.get('sku'),
             name=data.get('name'),
             description=data.get('description'),
             image_url=data.get('image_url'),
@@ -141,20 +194,30 @@ class ProductList(Resource):
 
 
 class ServiceList(Resource):
+    @conditional("services", "categories")
+    @cached("services")
     def get(self):
-        services = Service.query.all()
-        return [s.to_dict() for s in services], 200
+        try:
+            services, next_cursor = list_catalog(Service, request.args, price_column=Service.base_price)
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        return {"items": dump_all(services), "next_cursor": next_cursor}, 200
 
     @admin_required
     def post(self):
         data = request.get_json()
-        new_service = Service(
-            name=data.get('name'),
-            description=data.get('description'),
-            base_price=data.get('base_price'),
-            image_url=data.get('image_url'),
-            category_id=data.get('category_id')
-        )
+        try:
+            new_service = Service(
+                sku=data.get('sku'),
+                name=data.get('name'),
+                description=data.get('description'),
+                base_price=data.get('base_price'),
+                image_url=data.get('image_url'),
+                category_id=data.get('category_id'),
+                **{key: data[key] for key in ("slot_minutes", "slot_capacity", "opening_hour", "closing_hour") if key in data}
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
         db.session.add(new_service)
         db.session.commit()
         return  new_service.to_dict(), 201
@@ -162,7 +225,21 @@ class ServiceList(Resource):
 
 
 
+class Search(Resource):
+    @conditional("products", "services", "categories", "inventory_alerts")
+    @cached("search")
+    def get(self):
+        try:
+            items, next_cursor = search_catalog(request.args.get("type", "products"), request.args)
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        return {"items": dump_all(items), "next_cursor": next_cursor}, 200
+
+
+
+
 class DeliveryZoneList(Resource):
+    @cached("delivery-zones")
     def get(self):
         zones = DeliveryZone.query.all()
         return [z.to_dict() for z in zones], 200
@@ -182,9 +259,43 @@ class DeliveryZoneList(Resource):
 
 
 class ReviewList(Resource):
+    @conditional("reviews", "users", "products", "services")
     def get(self):
-        reviews = Review.query.all()
-        return [r.to_dict() for  r in reviews], 200
+        """Newest first, keyset paginated. Filter with product_id,
+        service_id, user_id or rating; a product or service filter also
+        returns that target's rating summary."""
+        query = Review.query.options(*eager(Review))
+        try:
+            product_id = int_arg(request.args, "product_id")
+            service_id = int_arg(request.args, "service_id")
+            user_id = int_arg(request.args, "user_id")
+            rating = int_arg(request.args, "rating")
+            if product_id is not None:
+                query = query.filter(Review.product_id == product_id)
+            if service_id is not None:
+                query = query.filter(Review.service_id == service_id)
+            if user_id is not None:
+                query = query.filter(Review.user_id == user_id)
+            if rating is not None:
+                query = query.filter(Review.rating == rating)
+            reviews, next_cursor = keyset_page(query, "-id", Review.id, Review.id, request.args, descending=True)
+        except ListingError as e:
+            return {"error": str(e)}, 400
+
+        body = {"items": dump_all(reviews), "next_cursor": next_cursor}
+        target = None
+        if product_id is not None:
+            target = db.session.get(Product, product_id)
+        elif service_id is not None:
+            target = db.session.get(Service, service_id)
+        if target is not None:
+            body["summary"] = {
+                "review_count": target.review_count,
+                "rating_average": target.rating_average,
+                "rating_histogram": target.rating_histogram,
+            }
+        return body, 200
+
     #implemented service layer constraint
     def post(self):
         data = request.get_json()
@@ -202,16 +313,24 @@ class ReviewList(Resource):
         # if (product_id and service_id) or (not product_id and not service_id):
         #     return {"error": "Review must target exactly one product or service"}, 400
 
-        new_review = Review(
-            user_id=user_id,
-            comment=data.get('comment'),
-            product_id=product_id,
-            service_id=service_id,
-            rating=data.get('rating')
-        )
+        try:
+            new_review = Review(
+                user_id=user_id,
+                comment=data.get('comment'),
+                product_id=product_id,
+                service_id=service_id,
+                #the validator rejects anything but an int 1-5, e.g. 4.7 or "4"
+                rating=data.get('rating')
+            )
+        except ValueError as e:
+            return {"error": str(e)}, 400
         db.session.add(new_review)
+        #aggregates move in the same transaction as the review itself
+        if not record_review(new_review):
+            db.session.rollback()
+            return {"error": "Product or service not found"}, 404
         db.session.commit()
-        return new_review.to_dict(), 201
+        return dump(new_review), 201
 
 
 
@@ -223,74 +342,105 @@ class AppointmentList(Resource):
         if not user_id:
             return {"error": "Unauthorized"}, 401
 
-        appointment_date = datetime.fromisoformat(data.get("appointment_date"))
+        service = db.session.get(Service, data.get("service_id"))
+        if not service:
+            return {"error": "Service not found"}, 404
+        try:
+            appointment_date = local_datetime(data.get("appointment_date"))
+        except (TypeError, ValueError):
+            return {"error": "appointment_date must be an ISO datetime"}, 400
         if appointment_date < datetime.now():
             return {"error": "Appointment date cannot be in the past"}, 400
-        new_appointment = Appointment(
-            user_id=user_id,
-            service_id=data.get('service_id'),
-            appointment_date=appointment_date,
-            notes=data.get("notes"),
-            total_price=data.get('total_price'),
-            payment_status=data.get('payment_status', 'pending')
-        )
-        db.session.add(new_appointment)
-        db.session.commit()
+        try:
+            book_slot(service, appointment_date)
+            new_appointment = Appointment(
+                user_id=user_id,
+                service_id=service.id,
+                appointment_date=appointment_date,
+                notes=data.get("notes"),
+                total_price=data.get('total_price', service.base_price),
+                #always counted against the slot book_slot just claimed
+                payment_status='Pending'
+            )
+            db.session.add(new_appointment)
+            db.session.commit()
+        except SlotUnavailable as e:
+            db.session.rollback()
+            return {"error": str(e)}, 409
+        except ValueError as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
         return new_appointment.to_dict(), 201
 
 
+class ServiceSlots(Resource):
+    def get(self, service_id):
+        service = db.session.get(Service, service_id)
+        if not service:
+            return {"error": "Service not found"}, 404
+        try:
+            return open_slots(service, request.args), 200
+        except ListingError as e:
+            return {"error": str(e)}, 400
 
 
 class CartList(Resource):
+    #read from the store, so write-behind and guest carts show up too
     def get(self):
-        user_id = session.get('user_id')
-        if not user_id:
+        store = cart_store()
+        key = cart_key(store)
+        if not key:
             return {"error": "Unauthorized"}, 401
-
-        carts = Cart.query.filter_by(user_id=user_id).all()
-        return [c.to_dict() for c in carts], 200
+        return [store.summary(key)], 200
 
 
 
 
 class CartItemList(Resource):
     def get(self):
-        user_id = session.get("user_id")
-        if not user_id:
+        store = cart_store()
+        key = cart_key(store)
+        if not key:
             return {"error": "Unauthorized"}, 401
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        return [item.to_dict() for item in cart.cart_items] if cart else [], 200
+        return store.summary(key)["items"], 200
+
+    #one product ({"product_id", "quantity"}) or a batch ({"items": [...]});
+    #each write returns the updated cart summary
     def post(self):
-        data = request.get_json()
-        user_id = session.get('user_id')
-        if not user_id:
+        return self._write("add", parse_lines, 201)
+
+    def patch(self):
+        return self._write("set", lambda data: parse_lines(data, increment=False), 200)
+
+    def delete(self):
+        return self._write("remove", parse_product_ids, 200)
+
+    def _write(self, operation, parse, status):
+        store = cart_store()
+        key = cart_key(store)
+        if not key:
             return {"error": "Unauthorized"}, 401
+        try:
+            getattr(store, operation)(key, parse(request.get_json(silent=True)))
+        except CartError as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
+        db.session.commit()
+        return store.summary(key), status
 
-        
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        product = db.session.get(Product, data.get("product_id"))
-        if not product or product.stock_quantity < data.get("quantity", 1):
-            return {"error": "Product unavailable or insufficient stock"}, 400
-        if not cart:
-            cart = Cart(user_id=user_id)
-            db.session.add(cart)
-            db.session.commit()
-        
-        item = CartItem.query.filter_by(cart_id=cart.id, product_id=product.id).first()    
-        if item:
-            item.quantity += data.get("quantity", 1)
-        else:
-            item = CartItem(
-                cart_id=cart.id,
-                product_id=product.id,
-                quantity=data.get('quantity', 1)
-            )
-            db.session.add(item)
-            db.session.commit()
-            
-                
 
-        return item.to_dict(), 201
+class CartSummary(Resource):
+    def get(self):
+        store = cart_store()
+        key = cart_key(store)
+        if not key:
+            return {"error": "Unauthorized"}, 401
+        try:
+            return store.summary(key, int_arg(request.args, "delivery_zone_id", minimum=1)), 200
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        except UnknownDeliveryZone as e:
+            return {"error": str(e)}, 404
 
 
 
@@ -327,6 +477,26 @@ class PaymentList(Resource):
 
 
 
+class MpesaCallback(Resource):
+    #Daraja only needs a fast ack; payment_callbacks.py applies the result later
+    def post(self):
+        token = app.config["MPESA_CALLBACK_TOKEN"]
+        #without a token anyone could post a "paid" callback
+        if not token and not app.debug:
+            app.logger.error("MPESA_CALLBACK_TOKEN is not set; rejecting M-Pesa callback")
+            return {"ResultCode": 1, "ResultDesc": "Callback token not configured"}, 403
+        if token and not hmac.compare_digest(request.args.get("token", ""), token):
+            return {"ResultCode": 1, "ResultDesc": "Forbidden"}, 403
+        try:
+            enqueue_callback(request.get_json(silent=True))
+        except InvalidCallback as e:
+            return {"ResultCode": 1, "ResultDesc": str(e)}, 400
+        db.session.commit()
+        return {"ResultCode": 0, "ResultDesc": "Accepted"}, 200
+
+
+
+
 class OrderList(Resource):
 
     def get(self):
@@ -334,12 +504,24 @@ class OrderList(Resource):
         if not user_id:
             return {"error": "Unauthorized"}, 401
 
-        user = db.session.get(User, user_id)
-        if user.role.name == "Admin":
-            orders = Order.query.all()
+        principal = current_principal()
+        if not principal:
+            return {"error": "Unauthorized"}, 401
+        query = Order.query.options(*eager(Order))
+        try:
+            min_total = int_arg(request.args, "min_total", minimum=0)
+            max_total = int_arg(request.args, "max_total", minimum=0)
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        if min_total is not None:
+            query = query.filter(Order.total_amount >= min_total)
+        if max_total is not None:
+            query = query.filter(Order.total_amount <= max_total)
+        if principal.role_name == "Admin":
+            orders = query.all()
         else:
-            orders = Order.query.filter_by(user_id=user_id).all()
-        return [o.to_dict() for o in orders], 200
+            orders = query.filter_by(user_id=user_id).all()
+        return dump_all(orders), 200
     def post(self):
         user_id = session.get("user_id")
         if not user_id:
@@ -350,70 +532,38 @@ class OrderList(Resource):
             return {"error": "Order cannot be empty"}, 400
 
         try:
-            new_order = Order(user_id=user_id, status="Pending")
-            for item in items:
-                product = Product.query.get(item["product_id"])
-                if not product or product.stock_quantity < item["quantity"]:
-                    db.session.rollback()
-                    return {"error": f"Insufficient stock for {product.name if product else "Uknown"}"}, 400
-                product.stock_quantity -= item["quantity"]
-                order_item = OrderItem(
-                    order=new_order,
-                    product_id=product.id,
-                    quantity=item["quantity"],
-                    unit_price=product.price
-                )
-                db.session.add(order_item)
-            db.session.add(new_order)
+            new_order, _ = place_order(user_id, [(item["product_id"], item["quantity"]) for item in items])
             db.session.commit()
-            return new_order.to_dict()
+            return dump(Order.query.options(*eager(Order)).filter_by(id=new_order.id).one())
+        except InsufficientStock as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
         except Exception as e:
+            db.session.rollback()
             return {"error": str(e)}, 422
 class Checkout(Resource):
     def post(self):
         user_id = session.get("user_id")
         if not user_id:
             return {"error": "Unauthorized"}, 401
-        cart = Cart.query.filter_by(user_id=user_id).first()
-        if not cart or not cart.cart_items:
+        store = cart_store()
+        key = cart_key(store)
+        lines = store.lines(key)
+        if not lines:
             return {"error": "Cart is empty"}, 400
         try:
-            new_order = Order(user_id=user_id, status="Pending")
-            for item in cart.cart_items:
-                product = item.product
-
-                if product.stock_quantity < item.quantity:
-                    db.session.rollback()
-                    return {"error": f"Insufficient stock for {product.name}"}, 400
-                product.stock_quantity -= item.quantity
-                if product.stock_quantity <= 5:
-                    #checks if it already exists to avoid duplication
-                    existing_alert = InventoryAlert.query.filter_by(product_id=product.id).first()
-                    if not existing_alert:
-                        new_alert = InventoryAlert(
-                            product_id=product.id,
-                            alert_threshold=5,
-                            current_stock=product.stock_quantity,
-                            is_resolved=False
-                        )
-                        db.session.add(new_alert)
-
-                order_item = OrderItem(
-                    order=new_order,
-                    product_id=product.id,
-                    quantity=item.quantity,
-                    unit_price=product.price
-                )
-                db.session.add(order_item)
-
-            # 3. Clear the cart after successful order creation
-            CartItem.query.filter_by(cart_id=cart.id).delete()
-            
-            db.session.add(new_order)
+            new_order, _ = place_order(user_id, list(lines.items()))
+
+            # 3. Clear the ordered lines once the order commits
+            store.checked_out(key, lines)
+
             db.session.commit()
-            
-            return new_order.to_dict(), 201
-            
+
+            return dump(Order.query.options(*eager(Order)).filter_by(id=new_order.id).one()), 201
+
+        except InsufficientStock as e:
+            db.session.rollback()
+            return {"error": str(e)}, 400
         except Exception as e:
             db.session.rollback()
             return {"error": str(e)}, 422
@@ -448,8 +598,14 @@ class OrderStatusHistoryResource(Resource):
 class InventoryAlertList(Resource):
     @admin_required
     def get(self):
-        alerts = InventoryAlert.query.all()
-        return [alert.to_dict() for alert in alerts]         
+        try:
+            active = bool_arg(request.args, "active")
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        query = InventoryAlert.query.options(*eager(InventoryAlert))
+        if active is not None:
+            query = query.filter(InventoryAlert.is_resolved.is_(not active))
+        return [alert.to_dict() for alert in query.order_by(InventoryAlert.id)]         
 
     @admin_required
     def delete(self, alert_id):
@@ -461,21 +617,66 @@ class InventoryAlertList(Resource):
         return {"error": "Alert not found"}, 204    
     
 
-# class DashboardSummary(Resource):
-#     @admin_required
-#     def get(self):
-#         # Calculate total revenue from completed payments
-#         total_revenue = db.session.query(db.func.sum(Payment.amount)).filter(Payment.status == 'Completed').scalar() or 0
-        
-#         # Gather counts for the admin notification badges
-#         summary = {
-#             "revenue": float(total_revenue),
-#             "pending_orders": Order.query.filter_by(status='Pending').count(),
-#             "low_stock_alerts": InventoryAlert.query.filter_by(is_resolved=False).count(),
-#             "upcoming_appointments": Appointment.query.filter(Appointment.appointment_date >= datetime.now()).count()
-#         }
-        
-#         return summary, 200
+class Export(Resource):
+    @admin_required
+    def get(self, name):
+        try:
+            return export_response(name, request.args)
+        except ListingError as e:
+            return {"error": str(e)}, 400
+
+
+class CatalogImport(Resource):
+    #raw CSV/NDJSON body or a multipart "file" upload, read as a stream
+    @admin_required
+    def post(self, kind):
+        upload = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+        try:
+            dry_run = bool_arg(request.args, "dry_run") or False
+        except ListingError as e:
+            return {"error": str(e)}, 400
+        fmt = request.args.get("format") or detect_format(
+            upload.mimetype if upload else request.mimetype, upload.filename if upload else None)
+        try:
+            stats = import_catalog(kind, text_stream(upload.stream if upload else request.stream), fmt, dry_run)
+        except CatalogImportError as e:
+            return {"error": str(e), "errors": e.errors}, 400
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return stats, 200
+
+
+class Report(Resource):
+    @admin_required
+    def get(self, name):
+        if name not in REPORTS:
+            return {"error": f"report must be one of {sorted(REPORTS)}"}, 404
+        try:
+            return REPORTS[name](request.args), 200
+        except ListingError as e:
+            return {"error": str(e)}, 400
+
+
+class CacheStats(Resource):
+    @admin_required
+    def get(self):
+        return catalog_cache.stats(), 200
+
+
+class Metrics(Resource):
+    #Prometheus text format; per worker process, see metrics.py
+    def get(self):
+        token = app.config["METRICS_TOKEN"]
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return {"error": "Forbidden"}, 403
+        return metrics_response()
+
+
+class DashboardSummary(Resource):
+    #reads the counters dashboard.py keeps up to date instead of COUNT/SUM scans
+    @admin_required
+    def get(self):
+        return dashboard_summary(), 200
 
 api.add_resource(Signup, '/signup')
 api.add_resource(Login, '/login')
@@ -485,17 +686,27 @@ api.add_resource(UserList, '/users')
 api.add_resource(CategoryList, '/categories')
 api.add_resource(ProductList, '/products')
 api.add_resource(ServiceList, '/services')
+api.add_resource(Search, '/search')
 api.add_resource(DeliveryZoneList, '/delivery-zones')
 api.add_resource(ReviewList, '/reviews')
 api.add_resource(AppointmentList, '/appointments')
+api.add_resource(ServiceSlots, '/services/<int:service_id>/slots')
 api.add_resource(CartList, '/carts')
 api.add_resource(CartItemList, '/cart-items')
+api.add_resource(CartSummary, '/cart')
 api.add_resource(PaymentList, '/payments')
+api.add_resource(MpesaCallback, '/payments/mpesa/callback')
 api.add_resource(OrderList, "/orders")
 api.add_resource(Checkout, "/check-out")
 api.add_resource(OrderStatusHistoryResource, "/order-history", "/order-history/<int:order_id>")
 
 api.add_resource(InventoryAlertList, "/alerts", "/alerts/<int:alert_id>")
+api.add_resource(CacheStats, "/cache-stats")
+api.add_resource(Metrics, "/metrics")
+api.add_resource(Export, "/exports/<string:name>")
+api.add_resource(CatalogImport, "/imports/<string:kind>")
+api.add_resource(DashboardSummary, "/dashboard-summary")
+api.add_resource(Report, "/reports/<string:name>")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_import_bench.db")
+
+from config import app, db
+from catalog_import import import_catalog
+
+# Builds a product CSV in memory and times a full import, a re-import of
+# the same SKUs (all updates) and a stock-only partial update.
+# Usage: python bench_import.py [products]
+
+WORDS = "dog cat puppy kitten bird fish leash collar bowl bed toy chew treat food shampoo brush".split()
+
+
+def catalog_csv(count, columns="full"):
+    random.seed(7)
+    lines = ["sku,stock_quantity"] if columns == "stock" else ["sku,name,description,price,stock_quantity,category"]
+    for i in range(1, count + 1):
+        if columns == "stock":
+            lines.append(f"SKU-{i:07d},{random.randint(0, 500)}")
+        else:
+            name = f"{random.choice(WORDS)} {random.choice(WORDS)}".title()
+            lines.append(f'SKU-{i:07d},{name},"{" ".join(random.choices(WORDS, k=10))}",'
+                         f'{random.randint(50, 5000)},{random.randint(0, 500)},Category {random.randint(1, 20)}')
+    return "\n".join(lines) + "\n"
+
+
+def timed(label, kind, text):
+    start = time.perf_counter()
+    stats = import_catalog(kind, io.StringIO(text), "csv")
+    print(f"{label:<28} {stats['rows']:>7} rows  {stats['inserted']:>7} new  {stats['updated']:>7} updated  "
+          f"{time.perf_counter() - start:6.2f}s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        timed("categories", "categories",
+              "name,category_type\n" + "".join(f"Category {i},Product\n" for i in range(1, 21)))
+        full = catalog_csv(count)
+        timed("products (insert)", "products", full)
+        timed("products (re-import)", "products", full)
+        timed("products (stock only)", "products", catalog_csv(count, "stock"))
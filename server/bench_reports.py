@@ -0,0 +1,77 @@
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_reports_bench.db")
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from models import Role, User, Product, DeliveryZone, Order, OrderItem
+from rollups import backfill
+
+# Generates a year of orders, rebuilds the rollups with the backfill and
+# times the /reports endpoints over the whole year.
+# Usage: python bench_reports.py [orders_per_day] [products]
+
+REPORTS = [
+    "/reports/sales?from=2025-01-01&to=2025-12-31",
+    "/reports/sales?granularity=hour&from=2025-01-01&to=2025-12-31",
+    "/reports/products?from=2025-01-01&to=2025-12-31&limit=20",
+    "/reports/zones?from=2025-01-01&to=2025-12-31",
+]
+
+
+def seed(per_day, product_count):
+    random.seed(7)
+    db.drop_all()
+    db.create_all()
+    db.session.add(Role(id=1, name="Admin"))
+    db.session.add(User(id=1, username="admin", email="admin@vetty.test", role_id=1, _password_hash="x"))
+    db.session.add_all([DeliveryZone(id=i, zone_name=f"Zone {i}", delivery_fee=100) for i in range(1, 6)])
+    db.session.execute(db.insert(Product), [
+        {"id": i, "name": f"Product {i}", "price": random.randint(50, 5000)} for i in range(1, product_count + 1)
+    ])
+    order_id = 0
+    start = datetime(2025, 1, 1)
+    for day in range(365):
+        orders, items = [], []
+        for _ in range(per_day):
+            order_id += 1
+            created_at = start + timedelta(days=day, seconds=random.randint(0, 86399))
+            orders.append({"id": order_id, "user_id": 1, "status": random.choice(["Pending", "Delivered", "Delivered", "Cancelled"]),
+                           "delivery_zone_id": random.choice([None, 1, 2, 3, 4, 5]), "created_at": created_at})
+            for _ in range(random.randint(1, 4)):
+                items.append({"order_id": order_id, "product_id": random.randint(1, product_count),
+                              "quantity": random.randint(1, 3), "unit_price": random.randint(50, 5000)})
+        db.session.execute(db.insert(Order), orders)
+        db.session.execute(db.insert(OrderItem), items)
+    db.session.commit()
+    return order_id
+
+
+if __name__ == "__main__":
+    per_day = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    app.secret_key = app.secret_key or "reports-bench"
+    with app.app_context():
+        count = seed(per_day, products)
+        start = time.perf_counter()
+        backfill()
+        print(f"{count} orders; backfill took {time.perf_counter() - start:.1f}s")
+
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s["user_id"] = 1
+        for path in REPORTS:
+            samples = []
+            for _ in range(10):
+                begin = time.perf_counter()
+                response = client.get(path)
+                samples.append((time.perf_counter() - begin) * 1000)
+            print(f"{response.status_code} {path:<66} p50={statistics.median(samples):6.1f}ms "
+                  f"max={max(samples):6.1f}ms rows={len(response.get_json())}")
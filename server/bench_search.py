@@ -0,0 +1,65 @@
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_search_bench.db")
+
+from config import app, db
+from models import Category, Product
+from search import search_catalog
+from serializers import dump_all
+
+# Times search_catalog() plus serialization (the catalog cache is
+# bypassed) against a generated catalog, for common and rare terms.
+# Usage: python bench_search.py [products] [runs_per_query]
+
+WORDS = ("dog cat puppy kitten bird fish leash collar bowl bed toy chew treat food shampoo "
+         "brush grooming harness crate litter scratcher aquarium filter vitamin flea tick").split()
+ADJECTIVES = "organic premium small large soft durable gentle natural steel plush".split()
+
+QUERIES = ["dog", "sham", "premium cat", "organic kitten treat", "aquarium filter steel", "zebra"]
+
+
+def seed(count):
+    random.seed(7)
+    db.session.add_all([Category(id=i, name=f"Category {i}", category_type="Product") for i in range(1, 21)])
+    rows = []
+    for i in range(1, count + 1):
+        name = f"{random.choice(ADJECTIVES)} {random.choice(WORDS)} {random.choice(WORDS)}".title()
+        description = " ".join(random.choices(WORDS + ADJECTIVES, k=12))
+        rows.append({"name": name, "description": description, "price": random.randint(50, 5000),
+                     "stock_quantity": 10, "category_id": random.randint(1, 20)})
+    db.session.execute(db.insert(Product), rows)
+    db.session.commit()
+
+
+def run(query, runs, **extra):
+    args = {"q": query, **extra}
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        items, _ = search_catalog("products", args)
+        dump_all(items)
+        samples.append((time.perf_counter() - start) * 1000)
+        db.session.remove()
+    return statistics.median(samples), max(samples)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        seed(count)
+        print(f"seeded {count} products in {time.perf_counter() - start:.1f}s")
+        for query in QUERIES:
+            for extra in ({}, {"category_id": "3"}):
+                p50, worst = run(query, runs, **extra)
+                label = f"q={query!r}" + (" category_id=3" if extra else "")
+                print(f"{label:<42} p50={p50:6.1f}ms  max={worst:6.1f}ms")
@@ -0,0 +1,49 @@
+import sys
+import time
+from datetime import datetime
+
+from config import app
+from models import Order, OrderItem, Product, DeliveryZone, OrderStatusHistory
+from serializers import dump
+
+# Compares SerializerMixin.to_dict() with the compiled serializer on
+# in-memory orders, so only serialization CPU is measured.
+# Usage: python bench_serializers.py [orders] [items_per_order]
+
+
+def build_orders(count, items_per_order):
+    zone = DeliveryZone(id=1, zone_name="Downtown", delivery_fee=100)
+    products = [
+        Product(id=i, name=f"Product {i}", description="Demo", price=100 + i, stock_quantity=50, category_id=1)
+        for i in range(1, 51)
+    ]
+    orders = []
+    for i in range(1, count + 1):
+        order = Order(id=i, user_id=1, status="Pending", created_at=datetime(2025, 1, 1, 12, 0), delivery_zone=zone)
+        for j in range(items_per_order):
+            product = products[(i + j) % len(products)]
+            order.order_items.append(OrderItem(id=i * items_per_order + j, product=product, quantity=2, unit_price=product.price))
+        order.history.append(OrderStatusHistory(id=i, status="Pending", changed_at=datetime(2025, 1, 1, 12, 0)))
+        orders.append(order)
+    return orders
+
+
+def timed(label, fn, orders):
+    start = time.perf_counter()
+    result = [fn(o) for o in orders]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:8.3f}s  {len(orders) / elapsed:10.0f} orders/s")
+    return result, elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    items_per_order = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with app.app_context():
+        orders = build_orders(count, items_per_order)
+        print(f"Serializing {count} orders with {items_per_order} items each")
+        expected, slow = timed("to_dict", lambda o: o.to_dict(), orders)
+        actual, fast = timed("compiled", dump, orders)
+        assert actual == expected, "compiled output differs from to_dict()"
+        print(f"speedup    {slow / fast:8.1f}x")
@@ -0,0 +1,269 @@
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_bench_suite.db")
+
+from werkzeug.serving import make_server
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from models import User, Product, Service
+from synthetic_data import PASSWORD, add_arguments, counts_from, generate
+
+# Generates a synthetic dataset, drives the main endpoints through the
+# Flask test client (default) or a threaded local server (--server), and
+# reports p50/p95/p99 latency and throughput per scenario. Results can be
+# saved as a baseline and later runs compared against it; a scenario
+# whose p95 grew or whose throughput fell by more than --tolerance is a
+# regression and makes the run exit 1.
+# Usage: python bench_suite.py [--scale small] [--requests 500] [--concurrency 4] [--server]
+#                              [--only products,orders] [--cart-store memory] [--reuse]
+#                              [--save-baseline] [--compare]
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+class TestClientDriver:
+    def __init__(self, user_id=None):
+        self.client = app.test_client()
+        if user_id:
+            with self.client.session_transaction() as s:
+                s["user_id"] = user_id
+
+    def request(self, method, path, payload=None):
+        return self.client.open(path, method=method, json=payload).status_code
+
+
+class HTTPDriver:
+    def __init__(self, base_url, user_id=None):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        if user_id:
+            username = "admin" if user_id == 1 else f"user{user_id}"
+            self.request("POST", "/login", {"username": username, "password": PASSWORD})
+
+    def request(self, method, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"})
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+# Each scenario is (needs a logged-in customer, step). A step gets the
+# driver and a per-worker Random and returns the status of the one request
+# it times; any untimed setup happens inside it before the clock starts.
+def _products(driver, rng, counts, clock):
+    args = rng.choice((
+        "limit=20", "limit=20&sort=-price", "limit=20&in_stock=true&sort=name",
+        f"limit=20&category_id={rng.randint(1, max(1, counts['categories'] // 2))}",
+        f"limit=50&min_price={rng.randint(0, 2000)}&max_price=5000",
+    ))
+    with clock:
+        return driver.request("GET", f"/products?{args}")
+
+
+def _orders(driver, rng, counts, clock):
+    with clock:
+        return driver.request("GET", "/orders")
+
+
+def _reviews(driver, rng, counts, clock):
+    with clock:
+        return driver.request("GET", f"/reviews?product_id={rng.randint(1, counts['products'])}&limit=20")
+
+
+def _review_create(driver, rng, counts, clock):
+    payload = {"product_id": rng.randint(1, counts["products"]), "rating": rng.randint(1, 5), "comment": "bench"}
+    with clock:
+        return driver.request("POST", "/reviews", payload)
+
+
+def _cart(driver, rng, counts, clock):
+    with clock:
+        return driver.request("POST", "/cart-items", {"product_id": rng.randint(1, counts["products"]), "quantity": 1})
+
+
+def _checkout(driver, rng, counts, clock):
+    for product_id in rng.sample(range(1, counts["products"] + 1), min(2, counts["products"])):
+        driver.request("POST", "/cart-items", {"product_id": product_id, "quantity": 1})
+    with clock:
+        return driver.request("POST", "/check-out")
+
+
+def _login(driver, rng, counts, clock):
+    payload = {"username": f"user{rng.randint(2, counts['users'])}", "password": PASSWORD}
+    with clock:
+        return driver.request("POST", "/login", payload)
+
+
+SCENARIOS = {
+    "products": (False, _products),
+    "orders": (True, _orders),
+    "reviews": (False, _reviews),
+    "review-create": (True, _review_create),
+    "cart": (True, _cart),
+    "checkout": (True, _checkout),
+    "login": (False, _login),
+}
+
+
+class Clock:
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def run_scenario(name, make_driver, counts, requests, concurrency, seed):
+    needs_user, step = SCENARIOS[name]
+    samples, statuses, lock = [], {}, threading.Lock()
+    per_worker = max(1, requests // concurrency)
+
+    def worker(index):
+        rng = random.Random(f"{seed}:{name}:{index}")
+        #distinct customers, so checkouts never share a cart
+        driver = make_driver(2 + index % (counts["users"] - 1) if needs_user else None)
+        step(driver, rng, counts, Clock())  # warm up connections and caches
+        clock, local, codes = Clock(), [], {}
+        for _ in range(per_worker):
+            status = step(driver, rng, counts, clock)
+            local.append(clock.elapsed * 1000)
+            codes[status] = codes.get(status, 0) + 1
+        with lock:
+            samples.extend(local)
+            for status, count in codes.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {"requests": len(samples), "p50": round(cuts[49], 2), "p95": round(cuts[94], 2),
+            "p99": round(cuts[98], 2), "rps": round(len(samples) / wall, 1), "errors": errors,
+            "statuses": {str(status): count for status, count in sorted(statuses.items())}}
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline; return the regressed scenarios."""
+    regressed = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:<14} no baseline")
+            continue
+        p95 = result["p95"] / before["p95"] - 1 if before["p95"] else 0
+        rps = result["rps"] / before["rps"] - 1 if before["rps"] else 0
+        worse = p95 > tolerance or rps < -tolerance
+        if worse:
+            regressed.append(name)
+        print(f"{name:<14} p95 {before['p95']:8.2f} -> {result['p95']:8.2f}ms ({p95:+.0%})  "
+              f"rps {before['rps']:8.1f} -> {result['rps']:8.1f} ({rps:+.0%})" + ("  REGRESSION" if worse else ""))
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the main endpoints against synthetic data.")
+    add_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--only", help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--server", action="store_true", help="go through a threaded local HTTP server")
+    parser.add_argument("--cart-store", choices=("database", "memory"), default="database",
+                        help="memory benchmarks the write-behind cart store")
+    parser.add_argument("--reuse", action="store_true", help="keep the existing data instead of regenerating it")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE, metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=BASELINE, metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95/throughput change (0.25 = 25%%)")
+    args = parser.parse_args()
+    counts = counts_from(parser, args)
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    app.secret_key = app.secret_key or "bench-suite"
+    #SQLite write contention would flood the output with slow-request logs
+    app.config["METRICS_SLOW_REQUEST_MS"] = None
+    app.config["CART_STORE"] = None if args.cart_store == "database" else args.cart_store
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if args.reuse:
+            counts.update(users=db.session.scalar(db.select(db.func.max(User.id))),
+                          products=db.session.scalar(db.select(db.func.max(Product.id))),
+                          services=db.session.scalar(db.select(db.func.max(Service.id))))
+        else:
+            start = time.perf_counter()
+            counts = generate(counts, args.seed)
+            print(f"generated {counts} in {time.perf_counter() - start:.1f}s")
+
+    server = None
+    if args.server:
+        logging.getLogger("werkzeug").disabled = True
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        make_driver = lambda user_id: HTTPDriver(base_url, user_id)  # noqa: E731
+    else:
+        make_driver = TestClientDriver
+
+    results = {}
+    print(f"{'scenario':<14} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'errors':>7}")
+    for name in names:
+        result = results[name] = run_scenario(name, make_driver, counts, args.requests, args.concurrency, args.seed)
+        print(f"{name:<14} {result['p50']:8.2f} {result['p95']:8.2f} {result['p99']:8.2f} "
+              f"{result['rps']:8.1f} {result['errors']:7d}")
+    if server:
+        server.shutdown()
+
+    run = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"counts": counts, "seed": args.seed, "requests": args.requests,
+                     "concurrency": args.concurrency, "mode": "server" if args.server else "test-client",
+                     "cart_store": args.cart_store,
+                     "database": dialect,
+                     "python": platform.python_version()},
+        "results": results,
+    }
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["settings"] != run["settings"]:
+            print("warning: baseline was recorded with different settings:", baseline["settings"])
+        regressed = compare(results, baseline, args.tolerance)
+        if regressed:
+            print(f"regressions: {', '.join(regressed)}")
+            status = 1
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import request
+from sqlalchemy import event
+
+from config import app, db
+from versions import VERSIONED_TABLES, table_versions, version_stamp
+
+
+app.config.setdefault("CATALOG_CACHE_TTL", 300)
+app.config.setdefault("CATALOG_CACHE_MAX_ENTRIES", 1024)
+
+# Which cached namespaces go stale when rows of a table change.
+# Catalog payloads embed categories, inventory alerts and reviews.
+INVALIDATES = {
+    "categories": ("categories", "products", "services", "search"),
+    "products": ("products", "search"),
+    "inventory_alerts": ("products", "search"),
+    "services": ("services", "search"),
+    "delivery_zones": ("delivery-zones",),
+}
+
+# The reverse: the tables each namespace's payloads are read from. Every
+# process bumps their table_versions rows on commit, so putting their
+# stamp in the key makes another worker's write a miss here as well; the
+# after_commit invalidation below only reaches the writing process.
+NAMESPACE_TABLES = {
+    namespace: {table for table, namespaces in INVALIDATES.items() if namespace in namespaces}
+    for namespace in {namespace for namespaces in INVALIDATES.values() for namespace in namespaces}
+}
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry TTL.
+
+    Any object with the same get/set/delete/clear methods (e.g. a thin
+    Redis wrapper) can be passed to Cache instead."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class Cache:
+    def __init__(self, backend=None, ttl=300):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def version(self, namespace):
+        #bumping the version orphans every key of the namespace at once
+        return self.backend.get(f"{namespace}:version") or 0
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.set(f"{namespace}:version", self.version(namespace) + 1)
+
+    def get_or_set(self, namespace, key, loader):
+        full_key = f"{namespace}:{self.version(namespace)}:{key}"
+        value = self.backend.get(full_key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+catalog_cache = Cache(
+    MemoryBackend(max_entries=app.config["CATALOG_CACHE_MAX_ENTRIES"]),
+    ttl=app.config["CATALOG_CACHE_TTL"],
+)
+
+
+def cached(namespace):
+    """Read-through cache for a Resource.get; only 200 responses are kept."""
+    tables = NAMESPACE_TABLES.get(namespace)
+    if not tables:
+        raise ValueError(f"add the tables behind {namespace} to cache.INVALIDATES")
+    unversioned = tables - VERSIONED_TABLES
+    if unversioned:
+        raise ValueError(f"add {', '.join(sorted(unversioned))} to versions.VERSIONED_TABLES")
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            stamp = version_stamp(table_versions(*tables))
+            key = f"{stamp}|{urlencode(sorted(request.args.items(multi=True)))}"
+
+            def load():
+                result = f(*args, **kwargs)
+                if isinstance(result, tuple) and result[1] != 200:
+                    raise _Uncacheable(result)
+                return result
+
+            try:
+                return catalog_cache.get_or_set(namespace, key, load)
+            except _Uncacheable as e:
+                return e.result
+        return decorated_function
+    return decorator
+
+
+class _Uncacheable(Exception):
+    def __init__(self, result):
+        self.result = result
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_changed_tables(session):
+    for table in session.info.pop("changed_tables", ()):
+        catalog_cache.invalidate(*INVALIDATES.get(table, ()))
+
@@ -0,0 +1,279 @@
+import atexit
+import logging
+import secrets
+import threading
+import time
+
+from flask import session
+from sqlalchemy import event
+
+from config import app, db
+from carts import (add_items, set_items, remove_items, replace_items, cart_lines, cart_summary, lines_summary,
+        product_stock, check_stock)
+
+
+app.config.setdefault("CART_FLUSH_INTERVAL", 2.0)  # seconds between write-behind flushes
+app.config.setdefault("CART_FLUSH_BATCH_SIZE", 200)  # carts written per flush transaction
+app.config.setdefault("CART_IDLE_SECONDS", 86400)  # flushed and guest carts idle this long leave the store
+
+logger = logging.getLogger(__name__)
+
+# Carts are addressed by key: "user:<id>", or "guest:<token>" for a
+# visitor whose token lives in the session cookie.
+#
+# Durability. The default DatabaseCartStore commits every change to
+# cart_items before responding. WriteBehindCartStore acknowledges a change
+# once it is in the backend and copies changed carts to cart_items every
+# CART_FLUSH_INTERVAL seconds and at interpreter exit, so a crash loses at
+# most the changes since the last flush. Checkout reads the store, never
+# cart_items, and removes the ordered lines from cart_items in the order's
+# own transaction, so a lost flush cannot bring bought items back. Guest
+# carts are never written to the database; login merges them into the
+# user's cart. MemoryCartBackend is per process, so with several workers
+# plug in a shared backend instead.
+
+
+class MemoryCartBackend:
+    """In-process carts keyed by cart key, with a version per cart so
+    flushes know what is still unwritten.
+
+    Any object with the same methods (e.g. Redis hashes plus a dirty set
+    updated from a Lua script) can be passed to WriteBehindCartStore."""
+
+    def __init__(self):
+        #key -> [lines, version, flushed version, last touched]
+        self._carts = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._carts.get(key)
+            if entry is None:
+                return None
+            entry[3] = time.monotonic()
+            return dict(entry[0])
+
+    def load(self, key, lines):
+        """Hold lines read from the database unless the key is already
+        held; return what is held."""
+        with self._lock:
+            entry = self._carts.setdefault(key, [dict(lines), 0, 0, time.monotonic()])
+            return dict(entry[0])
+
+    def update(self, key, change, durable=True):
+        """Replace the lines with change(lines) atomically; durable
+        changes are reported by dirty() until flushed."""
+        with self._lock:
+            entry = self._carts.setdefault(key, [{}, 0, 0, time.monotonic()])
+            entry[0] = change(dict(entry[0]))
+            entry[1] += durable
+            entry[3] = time.monotonic()
+            return dict(entry[0])
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._carts.pop(key, None)
+            return entry[0] if entry else None
+
+    def dirty(self, limit):
+        """Up to limit (key, lines, version) for carts with unflushed changes."""
+        with self._lock:
+            return [(key, dict(e[0]), e[1]) for key, e in self._carts.items() if e[1] != e[2]][:limit]
+
+    def flushed(self, key, version):
+        with self._lock:
+            entry = self._carts.get(key)
+            if entry is not None:
+                entry[2] = max(entry[2], version)
+
+    def evict(self, before):
+        """Drop clean carts last touched before the given monotonic time."""
+        with self._lock:
+            for key in [k for k, e in self._carts.items() if e[1] == e[2] and e[3] < before]:
+                del self._carts[key]
+
+
+def _user_id(key):
+    return int(key.split(":", 1)[1]) if key.startswith("user:") else None
+
+
+def _added(lines):
+    return lambda held: {**held, **{p: held.get(p, 0) + q for p, q in lines.items()}}
+
+
+def _subtracted(lines):
+    return lambda held: {p: q - lines.get(p, 0) for p, q in held.items() if q - lines.get(p, 0) > 0}
+
+
+class DatabaseCartStore:
+    """Write-through: every change is one statement on cart_items, which
+    the caller commits (see carts.py)."""
+    guests = False
+
+    def lines(self, key):
+        return cart_lines(_user_id(key))
+
+    def add(self, key, lines):
+        add_items(_user_id(key), lines)
+
+    def set(self, key, lines):
+        set_items(_user_id(key), lines)
+
+    def remove(self, key, product_ids):
+        remove_items(_user_id(key), product_ids)
+
+    def summary(self, key, delivery_zone_id=None):
+        return cart_summary(_user_id(key), delivery_zone_id)
+
+    def checked_out(self, key, lines):
+        remove_items(_user_id(key), list(lines))
+
+    def merge(self, guest_key, user_key):
+        pass
+
+
+class WriteBehindCartStore:
+    """Carts live in the backend and reach cart_items from a background
+    flusher; see the durability notes above."""
+    guests = True
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._flusher = None
+        self._lock = threading.Lock()
+
+    def lines(self, key):
+        lines = self.backend.get(key)
+        if lines is None:
+            #a user's cart is read through from the database on first use
+            lines = self.backend.load(key, cart_lines(_user_id(key))) if _user_id(key) else {}
+        return lines
+
+    def _change(self, key, change, checked=()):
+        self.lines(key)
+        stock = product_stock(checked) if checked else {}
+
+        def apply(held):
+            lines = change(held)
+            check_stock({p: lines[p] for p in checked if p in lines}, stock)
+            return lines
+
+        self.backend.update(key, apply, durable=_user_id(key) is not None)
+        self._start_flusher()
+
+    def add(self, key, lines):
+        self._change(key, _added(lines), list(lines))
+
+    def set(self, key, lines):
+        self._change(key, lambda held: {p: q for p, q in {**held, **lines}.items() if q},
+                     [p for p, q in lines.items() if q])
+
+    def remove(self, key, product_ids):
+        self._change(key, lambda held: {p: q for p, q in held.items() if p not in product_ids})
+
+    def summary(self, key, delivery_zone_id=None):
+        return lines_summary(self.lines(key), delivery_zone_id)
+
+    def checked_out(self, key, lines):
+        remove_items(_user_id(key), list(lines))
+        #the store only forgets the lines once the order has committed
+        db.session.info.setdefault("cart_checkouts", []).append((key, dict(lines)))
+
+    def merge(self, guest_key, user_key):
+        lines = self.backend.pop(guest_key)
+        if lines:
+            self.lines(user_key)
+            self.backend.update(user_key, _added(lines))
+            self._start_flusher()
+
+    def flush(self, limit=None):
+        """Write up to limit changed carts to cart_items in one
+        transaction; returns how many were written."""
+        batch = self.backend.dirty(limit or app.config["CART_FLUSH_BATCH_SIZE"])
+        if not batch:
+            return 0
+        #products deleted since they were added to a cart are left out
+        existing = product_stock({p for _, lines, _ in batch for p in lines})
+        for key, lines, _ in batch:
+            replace_items(_user_id(key), {p: q for p, q in lines.items() if p in existing})
+        db.session.commit()
+        for key, _, version in batch:
+            self.backend.flushed(key, version)
+        return len(batch)
+
+    def flush_all(self):
+        with app.app_context():
+            while self.flush():
+                pass
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="cart-flusher", daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush_all)
+
+    def _run(self):
+        while True:
+            time.sleep(app.config["CART_FLUSH_INTERVAL"])
+            with app.app_context():
+                try:
+                    while self.flush() == app.config["CART_FLUSH_BATCH_SIZE"]:
+                        pass
+                    self.backend.evict(time.monotonic() - app.config["CART_IDLE_SECONDS"])
+                except Exception:
+                    db.session.rollback()
+                    logger.exception("Cart flush failed; retrying in %ss", app.config["CART_FLUSH_INTERVAL"])
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def cart_store():
+    """The configured store, built on first use from CART_STORE."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            #None: write-through; "memory" or a backend object: write-behind
+            backend = app.config["CART_STORE"]
+            if backend is None:
+                _store = DatabaseCartStore()
+            elif isinstance(backend, str) and backend != "memory":
+                raise ValueError(f"Unknown CART_STORE {backend!r}; use database or memory")
+            else:
+                _store = WriteBehindCartStore(MemoryCartBackend() if backend == "memory" else backend)
+        return _store
+
+
+def cart_key(store):
+    """This session's cart key, or None for a visitor when the store
+    keeps no guest carts."""
+    user_id = session.get("user_id")
+    if user_id:
+        return f"user:{user_id}"
+    if not store.guests:
+        return None
+    if "cart_token" not in session:
+        session["cart_token"] = secrets.token_urlsafe(16)
+    return f"guest:{session['cart_token']}"
+
+
+def merge_guest_cart(user_id):
+    """Move the visitor's cart into the user's at login."""
+    token = session.pop("cart_token", None)
+    if token:
+        cart_store().merge(f"guest:{token}", f"user:{user_id}")
+
+
+@event.listens_for(db.session, "after_commit")
+def _forget_checked_out_lines(session):
+    for key, lines in session.info.pop("cart_checkouts", ()):
+        cart_store().backend.update(key, _subtracted(lines))
+
+
+@event.listens_for(db.session, "after_rollback")
+def _keep_checked_out_lines(session):
+    session.info.pop("cart_checkouts", None)
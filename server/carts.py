@@ -0,0 +1,223 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from models import Cart, CartItem, Product, DeliveryZone
+
+
+app.config.setdefault("CART_MAX_LINES", 100)  # products per batch request
+
+# Cart writes are single statements keyed on the unique constraints
+# (carts.user_id and uix_cart_product), so concurrent clicks on the same
+# product add up instead of racing a SELECT-then-INSERT. Stock is only
+# checked here as a courtesy; reserve_stock enforces it at checkout.
+
+
+class CartError(ValueError):
+    pass
+
+
+class UnknownDeliveryZone(CartError):
+    pass
+
+
+def _insert(model):
+    return (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(model.__table__)
+
+
+def parse_lines(data, increment=True):
+    """Read {"product_id", "quantity"} or {"items": [...]} into
+    {product_id: quantity}. Repeated products add up when incrementing,
+    otherwise the last one wins; 0 is only allowed when setting."""
+    minimum = 1 if increment else 0
+    items = data.get("items") if isinstance(data, dict) and "items" in data else [data]
+    if not isinstance(items, list) or not items:
+        raise CartError("items must be a non-empty list")
+    if len(items) > app.config["CART_MAX_LINES"]:
+        raise CartError(f"at most {app.config['CART_MAX_LINES']} items per request")
+    lines = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise CartError("each item must be an object")
+        product_id, quantity = item.get("product_id"), item.get("quantity", 1)
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            raise CartError("product_id must be an integer")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < minimum:
+            raise CartError(f"quantity must be an integer >= {minimum}")
+        lines[product_id] = lines.get(product_id, 0) + quantity if increment else quantity
+    return lines
+
+
+def parse_product_ids(data):
+    product_ids = data.get("product_ids") if isinstance(data, dict) else None
+    if not isinstance(product_ids, list) or not product_ids \
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in product_ids):
+        raise CartError("product_ids must be a non-empty list of integers")
+    if len(product_ids) > app.config["CART_MAX_LINES"]:
+        raise CartError(f"at most {app.config['CART_MAX_LINES']} items per request")
+    return product_ids
+
+
+def cart_id_for(user_id):
+    """The user's cart id, creating the cart on first use."""
+    insert = _insert(Cart)
+    #a no-op DO UPDATE (rather than DO NOTHING) so RETURNING yields the existing row
+    return db.session.execute(
+        insert.values(user_id=user_id)
+        .on_conflict_do_update(index_elements=["user_id"], set_={"user_id": insert.excluded.user_id})
+        .returning(Cart.__table__.c.id)
+    ).scalar_one()
+
+
+def product_stock(product_ids):
+    return dict(db.session.execute(
+        db.select(Product.id, Product.stock_quantity).where(Product.id.in_(product_ids))
+    ).all())
+
+
+def check_stock(lines, stock):
+    """Raise CartError unless every product exists and has stock for the
+    quantity the cart would hold."""
+    for product_id, quantity in lines.items():
+        if product_id not in stock:
+            raise CartError(f"Product {product_id} not found")
+        if quantity > stock[product_id]:
+            raise CartError(f"Insufficient stock for product {product_id}")
+
+
+def _check_stock(cart_id, lines, increment):
+    """One query for the products and the quantities already in the cart."""
+    rows = db.session.execute(
+        db.select(Product.id, Product.stock_quantity, CartItem.quantity)
+        .outerjoin(CartItem, (CartItem.product_id == Product.id) & (CartItem.cart_id == cart_id))
+        .where(Product.id.in_(lines))
+    ).all()
+    in_cart = {product_id: quantity or 0 for product_id, _, quantity in rows}
+    check_stock({product_id: (in_cart.get(product_id, 0) if increment else 0) + quantity
+                 for product_id, quantity in lines.items()},
+                {product_id: stock for product_id, stock, _ in rows})
+
+
+def add_items(user_id, lines):
+    """Add quantities to the cart, as one executemany of INSERT ... ON
+    CONFLICT (cart_id, product_id) DO UPDATE quantity = quantity + new."""
+    cart_id = cart_id_for(user_id)
+    _check_stock(cart_id, lines, increment=True)
+    _upsert(cart_id, lines, increment=True)
+
+
+def set_items(user_id, lines):
+    """Set line quantities; a quantity of 0 removes the line."""
+    cart_id = cart_id_for(user_id)
+    removed = [product_id for product_id, quantity in lines.items() if quantity == 0]
+    lines = {product_id: quantity for product_id, quantity in lines.items() if quantity}
+    if removed:
+        _delete(cart_id, removed)
+    if lines:
+        _check_stock(cart_id, lines, increment=False)
+        _upsert(cart_id, lines, increment=False)
+
+
+def remove_items(user_id, product_ids):
+    _delete(db.select(Cart.id).where(Cart.user_id == user_id).scalar_subquery(), product_ids)
+
+
+def replace_items(user_id, lines):
+    """Make the stored cart hold exactly lines (no stock check)."""
+    cart_id = cart_id_for(user_id)
+    db.session.execute(
+        db.delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id.not_in(lines))
+        .execution_options(synchronize_session=False)
+    )
+    if lines:
+        _upsert(cart_id, lines, increment=False)
+
+
+def cart_lines(user_id):
+    return dict(db.session.execute(
+        db.select(CartItem.product_id, CartItem.quantity).join(Cart, Cart.id == CartItem.cart_id)
+        .where(Cart.user_id == user_id).order_by(CartItem.id)
+    ).all())
+
+
+def _upsert(cart_id, lines, increment):
+    table = CartItem.__table__
+    insert = _insert(CartItem)
+    quantity = table.c.quantity + insert.excluded.quantity if increment else insert.excluded.quantity
+    db.session.execute(
+        insert.on_conflict_do_update(index_elements=["cart_id", "product_id"], set_={"quantity": quantity}),
+        [{"cart_id": cart_id, "product_id": product_id, "quantity": quantity} for product_id, quantity in lines.items()],
+    )
+
+
+def _delete(cart_id, product_ids):
+    db.session.execute(
+        db.delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id.in_(product_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _fee(delivery_zone_id):
+    if delivery_zone_id is None:
+        return db.null().label("delivery_fee")
+    return (db.select(DeliveryZone.delivery_fee).where(DeliveryZone.id == delivery_zone_id)
+            .scalar_subquery().label("delivery_fee"))
+
+
+def _item(row, quantity, subtotal):
+    return {"product_id": row.product_id, "name": row.name, "image_url": row.image_url, "unit_price": row.price,
+            "quantity": quantity, "subtotal": subtotal, "in_stock": quantity <= row.stock_quantity}
+
+
+def _summary(cart_id, items, items_total, item_count, delivery_zone_id, delivery_fee):
+    if items and delivery_zone_id is not None and delivery_fee is None:
+        raise UnknownDeliveryZone(f"Delivery zone {delivery_zone_id} not found")
+    #nothing to deliver for an empty cart
+    delivery_fee = (delivery_fee or 0) if items else 0
+    return {
+        "cart_id": cart_id,
+        "items": items,
+        "item_count": item_count,
+        "items_total": items_total,
+        "delivery_zone_id": delivery_zone_id,
+        "delivery_fee": delivery_fee,
+        "total": items_total + delivery_fee,
+    }
+
+
+def cart_summary(user_id, delivery_zone_id=None):
+    """Lines with subtotals, the items total, the delivery fee and the
+    grand total, from one query: the totals are window sums over the
+    lines and the fee a scalar subquery on delivery_zones."""
+    subtotal = (Product.price * CartItem.quantity).label("subtotal")
+    rows = db.session.execute(
+        db.select(
+            Cart.id.label("cart_id"), CartItem.product_id, Product.name, Product.image_url,
+            Product.price, Product.stock_quantity, CartItem.quantity, subtotal,
+            db.func.sum(subtotal).over().label("items_total"),
+            db.func.sum(CartItem.quantity).over().label("item_count"),
+            _fee(delivery_zone_id),
+        )
+        .select_from(Cart).join(CartItem, CartItem.cart_id == Cart.id).join(Product, Product.id == CartItem.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.id)
+    ).all()
+    if not rows:
+        return _summary(None, [], 0, 0, delivery_zone_id, None)
+    return _summary(rows[0].cart_id, [_item(r, r.quantity, r.subtotal) for r in rows],
+                    rows[0].items_total, rows[0].item_count, delivery_zone_id, rows[0].delivery_fee)
+
+
+def lines_summary(lines, delivery_zone_id=None):
+    """cart_summary for {product_id: quantity} held outside the database.
+    One query fetches the products and the fee; the line arithmetic is
+    done here, as a CASE carrying the quantities would be recompiled for
+    every cart."""
+    rows = db.session.execute(
+        db.select(Product.id.label("product_id"), Product.name, Product.image_url, Product.price,
+                  Product.stock_quantity, _fee(delivery_zone_id))
+        .where(Product.id.in_(lines))
+    ).all() if lines else []
+    products = {r.product_id: r for r in rows}
+    items = [_item(products[p], q, products[p].price * q) for p, q in lines.items() if p in products]
+    return _summary(None, items, sum(i["subtotal"] for i in items), sum(i["quantity"] for i in items),
+                    delivery_zone_id, rows[0].delivery_fee if rows else None)
@@ -0,0 +1,301 @@
+import csv
+import io
+import json
+import os
+import time
+
+import click
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+
+from config import app, db
+from models import Category, Product, Service, StockChange
+
+
+app.config.setdefault("IMPORT_BATCH_SIZE", 1000)
+app.config.setdefault("IMPORT_MAX_ERRORS", 20)  # stop reporting (and reading) after this many bad rows
+
+FORMATS = ("csv", "ndjson")
+
+
+class CatalogImportError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid row(s); nothing was imported")
+
+
+def _text(value, name):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (dict, list, bool)):
+        raise ValueError(f"{name} must be text")
+    return str(value).strip()
+
+
+def _integer(minimum=0, maximum=None):
+    def convert(value, name):
+        if value is None or value == "":
+            return None
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError(f"{name} must be an integer")
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer")
+        if value < minimum or (maximum is not None and value > maximum):
+            raise ValueError(f"{name} must be between {minimum} and {maximum}" if maximum is not None
+                             else f"{name} must be >= {minimum}")
+        return value
+    return convert
+
+
+# kind -> (model, column converters); sku is the upsert key, and a
+# "category" name or "category_id" is resolved against categories of the
+# matching type
+CATALOG_FIELDS = {
+    "products": (Product, {
+        "name": _text, "description": _text, "image_url": _text,
+        "price": _integer(), "stock_quantity": _integer(),
+    }),
+    "services": (Service, {
+        "name": _text, "description": _text, "image_url": _text, "base_price": _integer(),
+        "slot_minutes": _integer(1), "slot_capacity": _integer(1),
+        "opening_hour": _integer(0, 24), "closing_hour": _integer(0, 24),
+    }),
+}
+CATEGORY_TYPES = {"products": "Product", "services": "Service"}
+#columns that can never be empty, and those a new row must provide
+NOT_NULL = {"products": ("name",), "services": ("name", "slot_minutes", "slot_capacity", "opening_hour", "closing_hour")}
+REQUIRED = {"products": ("name",), "services": ("name",)}
+IMPORTS = ("categories", *CATALOG_FIELDS)
+
+
+def _insert(model):
+    return (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(model.__table__)
+
+
+def _read(stream, fmt):
+    """Yield (line number, row dict or None, error) without reading ahead."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, None, "more values than header columns"
+            else:
+                yield reader.line_num, row, None
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "each line must be a JSON object"
+        else:
+            yield number, row, None
+
+
+class _Importer:
+    def __init__(self, kind):
+        self.kind = kind
+        self.stats = {"kind": kind, "rows": 0, "inserted": 0, "updated": 0}
+        self.categories = {}
+        query = db.select(Category.id, Category.name, Category.category_type)
+        if kind in CATEGORY_TYPES:
+            query = query.where(Category.category_type == CATEGORY_TYPES[kind])
+        for category_id, name, category_type in db.session.execute(query):
+            self.categories[(name, category_type)] = category_id
+        self.category_ids = set(self.categories.values())
+
+    def validate(self, row):
+        if self.kind == "categories":
+            unknown = set(row) - {"name", "category_type"}
+            if unknown:
+                raise ValueError(f"unknown columns: {', '.join(sorted(map(str, unknown)))}")
+            name, category_type = _text(row.get("name"), "name"), _text(row.get("category_type"), "category_type")
+            if not name:
+                raise ValueError("name is required")
+            if category_type not in CATEGORY_TYPES.values():
+                raise ValueError("category_type must be Product or Service")
+            return {"name": name, "category_type": category_type}
+
+        _, fields = CATALOG_FIELDS[self.kind]
+        unknown = set(row) - set(fields) - {"sku", "category", "category_id"}
+        if unknown:
+            raise ValueError(f"unknown columns: {', '.join(sorted(map(str, unknown)))}")
+        sku = _text(row.get("sku"), "sku")
+        if not sku:
+            raise ValueError("sku is required")
+        values = {"sku": sku}
+        for name, convert in fields.items():
+            if name in row:
+                values[name] = convert(row[name], name)
+                if values[name] is None and name in NOT_NULL[self.kind]:
+                    raise ValueError(f"{name} cannot be empty")
+        if _text(row.get("category"), "category"):
+            key = (_text(row["category"], "category"), CATEGORY_TYPES[self.kind])
+            if key not in self.categories:
+                raise ValueError(f"unknown {key[1].lower()} category {key[0]!r}")
+            values["category_id"] = self.categories[key]
+        elif "category_id" in row:
+            values["category_id"] = _integer(1)(row["category_id"], "category_id")
+            if values["category_id"] is not None and values["category_id"] not in self.category_ids:
+                raise ValueError(f"unknown category_id {values['category_id']}")
+        return values
+
+    def load(self, batch, errors):
+        """Write a batch of (line, values); new SKUs missing required
+        columns are reported instead."""
+        if self.kind == "categories":
+            new = {}
+            for _, values in batch:
+                key = (values["name"], values["category_type"])
+                if key not in self.categories:
+                    new[key] = values
+            if new:
+                db.session.execute(db.insert(Category), list(new.values()))
+                for category_id, name, category_type in db.session.execute(
+                    db.select(Category.id, Category.name, Category.category_type)
+                    .where(Category.name.in_({name for name, _ in new}))
+                ):
+                    self.categories[(name, category_type)] = category_id
+            self.stats["inserted"] += len(new)
+            self.stats["updated"] += len(batch) - len(new)
+            return
+
+        model, _ = CATALOG_FIELDS[self.kind]
+        #the last row for a SKU wins, as if the rows were applied in order
+        latest = {}
+        for line, values in batch:
+            latest[values["sku"]] = (line, {**latest[values["sku"]][1], **values} if values["sku"] in latest else values)
+        existing = set(db.session.scalars(db.select(model.sku).where(model.sku.in_(latest))))
+        groups = {}
+        for sku, (line, values) in latest.items():
+            missing = [name for name in REQUIRED[self.kind] if sku not in existing and name not in values]
+            if missing:
+                errors.append({"line": line, "error": f"new sku {sku!r} needs {', '.join(missing)}"})
+                continue
+            groups.setdefault((tuple(sorted(values)), sku not in existing), []).append(values)
+        if errors:
+            return
+
+        for (columns, new), rows in groups.items():
+            table = model.__table__
+            updates = [name for name in columns if name != "sku"]
+            if not new:
+                #an INSERT would trip NOT NULL on the columns a partial row leaves out
+                if updates:
+                    db.session.execute(
+                        db.update(table).where(table.c.sku == db.bindparam("b_sku"))
+                        .values({name: db.bindparam(f"b_{name}") for name in updates}),
+                        [{f"b_{name}": value for name, value in values.items()} for values in rows],
+                    )
+                continue
+            #executemany of one cached statement; a multi-row .values() recompiles every batch
+            insert = _insert(model)
+            statement = insert
+            if updates:
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c.sku], set_={name: insert.excluded[name] for name in updates})
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=[table.c.sku])
+            db.session.execute(statement, rows)
+        if model is Product:
+            #the upsert bypasses the session events that queue alert evaluation
+            db.session.execute(db.insert(StockChange).from_select(
+                ["product_id"], db.select(Product.id).where(Product.sku.in_(latest))))
+        self.stats["inserted"] += len(latest) - len(existing)
+        self.stats["updated"] += len(existing)
+
+
+def import_catalog(kind, stream, fmt="csv", dry_run=False):
+    """Validate and upsert a CSV or NDJSON text stream of categories,
+    products or services in one transaction.
+
+    Rows are validated as they are read and written every
+    IMPORT_BATCH_SIZE rows as one executemany of INSERT ... ON CONFLICT
+    (sku) DO UPDATE (or a keyed UPDATE when every SKU exists), so memory
+    stays flat however large the file is. Only the
+    columns present in a row are written, which allows partial updates
+    such as a sku,stock_quantity file. Any invalid row rolls the whole
+    import back with CatalogImportError; dry_run always rolls back.
+    Returns row counts."""
+    if kind not in IMPORTS:
+        raise ValueError(f"kind must be one of {list(IMPORTS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+    start = time.perf_counter()
+    importer = _Importer(kind)
+    batch_size, max_errors = app.config["IMPORT_BATCH_SIZE"], app.config["IMPORT_MAX_ERRORS"]
+    errors, batch = [], []
+    try:
+        for line, row, error in _read(stream, fmt):
+            if error is None:
+                try:
+                    batch.append((line, importer.validate(row)))
+                    importer.stats["rows"] += 1
+                except ValueError as e:
+                    error = str(e)
+            if error is not None:
+                errors.append({"line": line, "error": error})
+                if len(errors) >= max_errors:
+                    break
+            if len(batch) >= batch_size:
+                #once a row is bad nothing will be kept, so only validate from here on
+                if not errors:
+                    importer.load(batch, errors)
+                batch = []
+        if batch and not errors:
+            importer.load(batch, errors)
+    except (DBAPIError, UnicodeDecodeError, csv.Error) as e:
+        errors.append({"line": None, "error": str(getattr(e, "orig", e))})
+
+    if errors:
+        db.session.rollback()
+        raise CatalogImportError(errors)
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    return {**importer.stats, "dry_run": dry_run, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def detect_format(mimetype=None, filename=None):
+    if filename:
+        extension = os.path.splitext(filename)[1].lower().lstrip(".")
+        if extension in ("csv", "ndjson", "jsonl"):
+            return "csv" if extension == "csv" else "ndjson"
+    if mimetype in ("application/x-ndjson", "application/jsonl", "application/json"):
+        return "ndjson"
+    return "csv"
+
+
+def text_stream(binary):
+    #utf-8-sig drops the BOM spreadsheet exports start with
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+@app.cli.group()
+def catalog():
+    """Catalog bulk import."""
+
+
+@catalog.command("import")
+@click.argument("kind", type=click.Choice(IMPORTS))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="default: from the file extension")
+@click.option("--dry-run", is_flag=True, help="validate and roll back")
+def import_command(kind, path, fmt, dry_run):
+    """Upsert categories, products or services from a CSV or NDJSON file."""
+    with open(path, "rb") as f:
+        try:
+            stats = import_catalog(kind, text_stream(f), fmt or detect_format(filename=path), dry_run)
+        except CatalogImportError as e:
+            for error in e.errors:
+                click.echo(f"line {error['line']}: {error['error']}", err=True)
+            raise click.ClickException(str(e))
+    click.echo(f"{stats['rows']} rows ({stats['inserted']} new, {stats['updated']} updated) in {stats['seconds']}s"
+               + (" [dry run, rolled back]" if dry_run else ""))
@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_booking_race.db")
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from models import Role, User, Service, Appointment, AppointmentSlot
+
+# Fires many concurrent bookings at the same slot and checks that exactly
+# slot_capacity of them succeed, that the rest get 409, and that the slot
+# counter matches the appointments table. Then cancels one and checks the
+# place is offered again.
+# Usage: python check_booking_race.py [clients] [capacity]
+
+
+def seed(clients, capacity):
+    db.drop_all()
+    db.create_all()
+    db.session.add(Role(id=1, name="Customer"))
+    db.session.add_all([
+        User(id=i, username=f"user{i}", email=f"user{i}@vetty.test", role_id=1, _password_hash="x")
+        for i in range(1, clients + 1)
+    ])
+    db.session.add(Service(id=1, name="Grooming", base_price=1500, slot_minutes=30, slot_capacity=capacity))
+    db.session.commit()
+
+
+def book(user_id, slot, statuses, barrier, lock):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["user_id"] = user_id
+    barrier.wait()
+    response = client.post("/appointments", json={"service_id": 1, "appointment_date": slot.isoformat()})
+    with lock:
+        statuses[response.status_code] += 1
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    app.secret_key = app.secret_key or "booking-race"
+    slot = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time()) + timedelta(hours=10)
+    with app.app_context():
+        seed(clients, capacity)
+        db.session.remove()
+
+    statuses, lock = Counter(), threading.Lock()
+    barrier = threading.Barrier(clients)
+    threads = [threading.Thread(target=book, args=(i, slot, statuses, barrier, lock)) for i in range(1, clients + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        appointments = Appointment.query.filter_by(service_id=1, appointment_date=slot).count()
+        booked = db.session.get(AppointmentSlot, (1, slot)).booked
+        print(f"{clients} clients, capacity {capacity}: statuses={dict(statuses)} appointments={appointments} booked={booked}")
+        assert statuses[201] == capacity and statuses[409] == clients - capacity, statuses
+        assert appointments == booked == capacity
+
+        appointment = Appointment.query.filter_by(appointment_date=slot).first()
+        appointment.payment_status = "Cancelled"
+        db.session.commit()
+        client = app.test_client()
+        day = slot.date().isoformat()
+        offered = {s["starts_at"]: s["available"] for s in client.get(f"/services/1/slots?from={day}&to={day}").get_json()}
+        assert offered.get(slot.isoformat()) == 1, offered
+        print("OK: no overbooking, and the cancelled place is offered again")
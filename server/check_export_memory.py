@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_export_memory.db")
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from models import Role, User, Product, Order, OrderItem
+from loaders import eager
+from serializers import dump_all
+
+# Streams /exports/orders and /exports/order-items at two catalog sizes
+# and reports peak Python heap, next to building the old in-memory
+# list of order dicts. Streaming peaks should not grow with the row count.
+# Usage: python check_export_memory.py [small_orders] [large_orders]
+
+
+def seed(count):
+    db.drop_all()
+    db.create_all()
+    db.session.add(Role(id=1, name="Admin"))
+    db.session.add(User(id=1, username="admin", email="admin@vetty.test", role_id=1, _password_hash="x"))
+    db.session.execute(db.insert(Product), [{"id": i, "name": f"Product {i}", "price": 100 + i} for i in range(1, 51)])
+    start = datetime(2025, 1, 1)
+    db.session.execute(db.insert(Order), [
+        {"id": i, "user_id": 1, "status": "Delivered", "created_at": start + timedelta(minutes=i)}
+        for i in range(1, count + 1)
+    ])
+    db.session.execute(db.insert(OrderItem), [
+        {"order_id": i, "product_id": (i + j) % 50 + 1, "quantity": 2, "unit_price": 150}
+        for i in range(1, count + 1) for j in range(3)
+    ])
+    db.session.commit()
+
+
+def peak(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return top / 1024 / 1024, elapsed, size
+
+
+def streamed(client, path):
+    def run():
+        response = client.get(path)
+        return sum(len(chunk) for chunk in response.response)
+    return run
+
+
+def in_memory():
+    orders = Order.query.options(*eager(Order)).all()
+    result = dump_all(orders)
+    db.session.remove()
+    return len(result)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:3]] or [10000, 50000]
+    app.secret_key = app.secret_key or "export-memory"
+    with app.app_context():
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s["user_id"] = 1
+        for count in sizes:
+            seed(count)
+            for label, fn in (
+                ("orders.ndjson", streamed(client, "/exports/orders")),
+                ("order-items.csv", streamed(client, "/exports/order-items?format=csv")),
+                ("in-memory to_dict list", in_memory),
+            ):
+                mb, elapsed, size = peak(fn)
+                print(f"{count:>7} orders  {label:<24} peak={mb:7.1f}MB  {elapsed:6.2f}s  ({size} bytes/rows)")
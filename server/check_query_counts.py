@@ -0,0 +1,118 @@
+import os
+import sys
+
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import event
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from cache import catalog_cache
+from principal import invalidate_all_principals
+from ratings import rebuild_rating_stats
+from models import (Role, User, Category, Product, Service, Review, Order, OrderItem,
+        OrderStatusHistory, InventoryAlert, DeliveryZone, Payment)
+
+# Seeds an in-memory SQLite database at two sizes and counts the statements
+# each list endpoint below issues. Related rows are eager loaded, so the
+# count must not grow with the number of rows returned; a difference means
+# a lazy load (N+1) crept into the endpoint or its serializer.
+# Usage: python check_query_counts.py   (exit status 1 on a growing count)
+
+SIZES = (3, 15)  # rows per list, kept under the default page size
+
+ENDPOINTS = [
+    # (path, user_id or None)
+    ("/products", None),
+    ("/services", None),
+    ("/orders", 1),
+    ("/orders", 2),
+    ("/reviews", None),
+    ("/reviews?product_id=1", None),
+]
+
+
+def seed(n):
+    db.session.add_all([Role(id=1, name="Admin"), Role(id=2, name="Customer")])
+    zones = [DeliveryZone(zone_name=f"Zone {i}", delivery_fee=100 + i) for i in range(n)]
+    product_cats = [Category(name=f"Food {i}", category_type="Product") for i in range(n)]
+    service_cats = [Category(name=f"Grooming {i}", category_type="Service") for i in range(n)]
+    db.session.add_all(zones + product_cats + service_cats)
+    users = [User(id=i, username=f"user{i}", email=f"user{i}@vetty.test", role_id=1 if i == 1 else 2,
+                  _password_hash="x") for i in range(1, n + 2)]
+    products = [Product(name=f"Product {i}", price=100 + i, stock_quantity=10, category=product_cats[i])
+                for i in range(n)]
+    services = [Service(name=f"Service {i}", base_price=500 + i, category=service_cats[i]) for i in range(n)]
+    db.session.add_all(users + products + services)
+    db.session.flush()
+
+    db.session.add_all([InventoryAlert(product_id=p.id, threshold=5) for p in products])
+    #user 2 owns n orders, the other customers one each
+    owners = [2] * n + [u.id for u in users[2:]]
+    orders = [Order(user_id=owner, status="Pending", delivery_zone=zones[i % n]) for i, owner in enumerate(owners)]
+    db.session.add_all(orders)
+    db.session.flush()
+    for i, order in enumerate(orders):
+        for product in (products[i % n], products[(i + 1) % n]):
+            db.session.add(OrderItem(order_id=order.id, product_id=product.id, quantity=1, unit_price=product.price))
+        db.session.add(OrderStatusHistory(order_id=order.id, status="Pending"))
+    db.session.execute(Payment.__table__.insert(), [
+        {"user_id": order.user_id, "order_id": order.id, "payment_method": "Cash", "amount": 100, "status": "pending"}
+        for order in orders
+    ])
+    db.session.execute(Review.__table__.insert(), [
+        {"user_id": users[1 + i % n].id, "product_id": products[0].id if i % 2 else None,
+         "service_id": None if i % 2 else services[i % n].id, "rating": 1 + i % 5, "comment": f"Review {i}"}
+        for i in range(2 * n)
+    ])
+    rebuild_rating_stats()
+    db.session.commit()
+
+
+def count_statements(client, path, user_id):
+    with client.session_transaction() as s:
+        s["user_id"] = user_id
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    response = client.get(path)
+    event.remove(db.engine, "before_cursor_execute", capture)
+    db.session.remove()
+    return response, len(statements)
+
+
+if __name__ == "__main__":
+    app.secret_key = app.secret_key or "query-count-check"
+    counts = {}
+    with app.app_context():
+        client = app.test_client()
+        for n in SIZES:
+            db.drop_all()
+            db.create_all()
+            seed(n)
+            db.session.remove()
+            #start both sizes cold: cached responses and principals skip queries
+            catalog_cache.backend.clear()
+            invalidate_all_principals()
+            for path, user_id in ENDPOINTS:
+                response, count = count_statements(client, path, user_id)
+                if response.status_code != 200:
+                    print(f"{response.status_code} {path}: {response.get_data(as_text=True)[:200]}")
+                    sys.exit(1)
+                counts.setdefault((path, user_id), []).append(count)
+
+    failures = 0
+    for (path, user_id), per_size in counts.items():
+        grows = len(set(per_size)) > 1
+        failures += grows
+        label = f"{path} (user {user_id})" if user_id else path
+        sizes = ", ".join(f"{n} rows: {c}" for n, c in zip(SIZES, per_size))
+        print(f"{'GROWS' if grows else 'ok   '} {label}: {sizes}")
+
+    if failures:
+        print(f"{failures} endpoint(s) issue more statements as the data grows")
+        sys.exit(1)
+    print("OK: statement counts are constant")
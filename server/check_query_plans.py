@@ -0,0 +1,133 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import event
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from ratings import rebuild_rating_stats
+from models import (Role, User, Category, Product, Service, Review, Order, OrderItem,
+        OrderStatusHistory, Cart, CartItem, InventoryAlert, DeliveryZone, Appointment, Payment)
+
+# Runs EXPLAIN QUERY PLAN on every SELECT the endpoints below issue against
+# a small seeded in-memory SQLite database and fails on full table scans.
+# Each endpoint may scan only the tables it intentionally lists.
+# Usage: python check_query_plans.py   (exit status 1 on an unexpected scan)
+
+ENDPOINTS = [
+    # (path, user_id or None, tables allowed to be scanned)
+    ("/categories", None, {"categories"}),
+    ("/products", None, {"products"}),
+    ("/products?category_id=1", None, set()),
+    ("/products?sort=price&limit=5", None, {"products"}),
+    ("/products?sort=-name&limit=5", None, {"products"}),
+    ("/services", None, {"services"}),
+    ("/services?category_id=2", None, set()),
+    ("/search?q=prod", None, {"products_fts"}),
+    ("/search?q=serv&type=services&category_id=2", None, {"services_fts"}),
+    ("/delivery-zones", None, {"delivery_zones"}),
+    ("/reviews", None, {"reviews"}),
+    ("/reviews?product_id=1", None, set()),
+    ("/reviews?service_id=1&rating=4", None, set()),
+    ("/users", 1, {"users"}),
+    ("/orders", 1, {"orders"}),
+    ("/orders", 2, set()),
+    ("/alerts", 1, {"inventory_alerts"}),
+    ("/carts", 2, set()),
+    ("/cart-items", 2, set()),
+    ("/cart", 2, set()),
+    ("/order-history/1", 2, set()),
+    ("/check_session", 2, set()),
+]
+
+
+def seed():
+    db.session.add_all([Role(id=1, name="Admin"), Role(id=2, name="Customer")])
+    products_cat = Category(id=1, name="Food", category_type="Product")
+    services_cat = Category(id=2, name="Grooming", category_type="Service")
+    zone = DeliveryZone(zone_name="Downtown", delivery_fee=100)
+    db.session.add_all([products_cat, services_cat, zone])
+    for i in (1, 2):
+        user = User(id=i, username=f"user{i}", email=f"user{i}@vetty.test", role_id=i, _password_hash="x")
+        db.session.add(user)
+    products = [Product(name=f"Product {i}", price=100 + i, stock_quantity=10, category=products_cat) for i in range(5)]
+    services = [Service(name=f"Service {i}", base_price=500, category=services_cat) for i in range(3)]
+    db.session.add_all(products + services)
+    db.session.flush()
+
+    db.session.add(InventoryAlert(product_id=products[0].id, threshold=5))
+    cart = Cart(user_id=2)
+    db.session.add(cart)
+    db.session.flush()
+    db.session.add(CartItem(cart_id=cart.id, product_id=products[1].id, quantity=1))
+    order = Order(user_id=2, status="Pending", delivery_zone=zone)
+    db.session.add(order)
+    db.session.flush()
+    db.session.add(OrderItem(order_id=order.id, product_id=products[0].id, quantity=1, unit_price=100))
+    db.session.add(OrderStatusHistory(order_id=order.id, status="Pending"))
+    appointment = Appointment(user_id=2, service=services[0], appointment_date=datetime.now() + timedelta(days=1))
+    db.session.add(appointment)
+    db.session.flush()
+    db.session.execute(Review.__table__.insert(), [
+        {"user_id": 2, "product_id": products[0].id, "service_id": None, "rating": 5, "comment": "Great"},
+        {"user_id": 2, "product_id": None, "service_id": services[0].id, "rating": 4, "comment": "Good"},
+    ])
+    db.session.execute(Payment.__table__.insert(), [
+        {"user_id": 2, "order_id": order.id, "payment_method": "Cash", "amount": 100, "status": "pending"},
+    ])
+    rebuild_rating_stats()
+    db.session.commit()
+
+
+def full_scans(connection, statement, parameters, allowed):
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        if detail.startswith("SCAN "):
+            table = detail.split()[1]
+            #a materialized subquery (e.g. window sums) holds rows already found by index
+            if table.startswith("(subquery"):
+                continue
+            if table not in allowed:
+                scans.append(detail)
+    return scans
+
+
+if __name__ == "__main__":
+    app.secret_key = app.secret_key or "query-plan-check"
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        seed()
+        client = app.test_client()
+
+        for path, user_id, allowed in ENDPOINTS:
+            with client.session_transaction() as s:
+                s["user_id"] = user_id
+
+            statements = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith("SELECT") and not executemany:
+                    statements.append((statement, parameters))
+
+            event.listen(db.engine, "before_cursor_execute", capture)
+            response = client.get(path)
+            event.remove(db.engine, "before_cursor_execute", capture)
+            db.session.remove()
+
+            with db.engine.connect() as connection:
+                for statement, parameters in statements:
+                    for scan in full_scans(connection, statement, parameters, allowed):
+                        failures += 1
+                        print(f"FULL SCAN {path}: {scan}\n    {' '.join(statement.split())[:200]}")
+            print(f"{response.status_code} {path} ({len(statements)} selects)")
+
+    if failures:
+        print(f"{failures} unexpected full scan(s)")
+        sys.exit(1)
+    print("OK: no unexpected full scans")
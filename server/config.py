@@ -10,15 +10,57 @@ from flask_migrate import Migrate
 from flask_restful import Api
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event
+from sqlalchemy.engine import Engine
 
 app = Flask(__name__)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///app.db"
+database_uri = os.environ.get("DATABASE_URL", "sqlite:///app.db")
+#some hosts still hand out the pre-1.4 "postgres://" scheme
+if database_uri.startswith("postgres://"):
+    database_uri = database_uri.replace("postgres://", "postgresql://", 1)
+
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+engine_options = {
+    "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true",
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+}
+if database_uri.startswith("sqlite"):
+    #let the driver wait for a writer instead of raising "database is locked"
+    engine_options["connect_args"] = {"timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)) / 1000}
+else:
+    engine_options.update(
+        pool_size=int(os.environ.get("DB_POOL_SIZE", 10)),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+        pool_timeout=int(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    )
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    #negative means KiB rather than pages
+    "cache_size": -int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024)),
+}
+
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if type(dbapi_connection).__module__ != "sqlite3":
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
 app.json.compact = False
 
 metadata = MetaData(naming_convention={
+    "ix": "ix_%(column_0_label)s",
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 db = SQLAlchemy(metadata=metadata)
@@ -26,7 +68,16 @@ db = SQLAlchemy(metadata=metadata)
 migrate = Migrate(app, db)
 db.init_app(app)
 
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
 bcrypt = Bcrypt(app)
 
+#required as ?token= on the M-Pesa callback URL (optional in debug)
+app.config['MPESA_CALLBACK_TOKEN'] = os.environ.get("MPESA_CALLBACK_TOKEN") or None
+#if set, /metrics requires "Authorization: Bearer <token>"
+app.config['METRICS_TOKEN'] = os.environ.get("METRICS_TOKEN") or None
+#"database" (write-through) or "memory" (write-behind, see cart_store.py)
+cart_store_mode = os.environ.get("CART_STORE", "database")
+app.config['CART_STORE'] = None if cart_store_mode == "database" else cart_store_mode
+
 api = Api(app)
 CORS(app)
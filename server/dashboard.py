@@ -0,0 +1,184 @@
+import logging
+import time
+from collections import Counter
+from datetime import datetime, date, timezone
+
+from sqlalchemy import event, inspect, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from models import Payment, Order, InventoryAlert, Appointment, DashboardCounter
+
+
+app.config.setdefault("DASHBOARD_RECONCILE_INTERVAL", 600)
+
+logger = logging.getLogger(__name__)
+
+# Counter rows: "revenue" (sum of successful payments), "pending_orders",
+# "low_stock_alerts" (unresolved alerts) and one "appointments:YYYY-MM-DD" row per day, so
+# upcoming appointments are a short range read that never goes stale.
+APPOINTMENT_PREFIX = "appointments:"
+
+
+def appointment_key(value):
+    day = value.date() if isinstance(value, datetime) else value
+    return f"{APPOINTMENT_PREFIX}{day.isoformat()}"
+
+
+def add_to_counters(session, deltas):
+    """Queue counter deltas; they are written when the session commits."""
+    pending = session.info.setdefault("counter_deltas", Counter())
+    pending.update(deltas)
+
+
+def _values(obj, key):
+    #(old, new) for an attribute inside after_flush
+    history = inspect(obj).attrs[key].history
+    new = history.added[0] if history.added else (history.unchanged[0] if history.unchanged else None)
+    old = history.deleted[0] if history.deleted else (None if history.added else new)
+    return old, new
+
+
+def _revenue(status, amount):
+    return (amount or 0) if status == "success" else 0
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_counter_deltas(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Order):
+            deltas["pending_orders"] += obj.status == "Pending"
+        elif isinstance(obj, Payment):
+            deltas["revenue"] += _revenue(obj.status, obj.amount)
+        elif isinstance(obj, InventoryAlert):
+            deltas["low_stock_alerts"] += obj.is_resolved is False
+        elif isinstance(obj, Appointment) and obj.appointment_date:
+            deltas[appointment_key(obj.appointment_date)] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Order):
+            old, new = _values(obj, "status")
+            deltas["pending_orders"] += (new == "Pending") - (old == "Pending")
+        elif isinstance(obj, Payment):
+            old_status, new_status = _values(obj, "status")
+            old_amount, new_amount = _values(obj, "amount")
+            deltas["revenue"] += _revenue(new_status, new_amount) - _revenue(old_status, old_amount)
+        elif isinstance(obj, InventoryAlert):
+            old, new = _values(obj, "is_resolved")
+            deltas["low_stock_alerts"] += (new is False) - (old is False)
+        elif isinstance(obj, Appointment):
+            old, new = _values(obj, "appointment_date")
+            if old != new:
+                if old:
+                    deltas[appointment_key(old)] -= 1
+                if new:
+                    deltas[appointment_key(new)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            deltas["pending_orders"] -= obj.status == "Pending"
+        elif isinstance(obj, Payment):
+            deltas["revenue"] -= _revenue(obj.status, obj.amount)
+        elif isinstance(obj, InventoryAlert):
+            deltas["low_stock_alerts"] -= obj.is_resolved is False
+        elif isinstance(obj, Appointment) and obj.appointment_date:
+            deltas[appointment_key(obj.appointment_date)] -= 1
+    if any(deltas.values()):
+        add_to_counters(session, deltas)
+
+
+#make the old value available to after_flush even when the attribute was
+#expired before being overwritten
+for _attribute in (Order.status, Payment.status, Payment.amount, InventoryAlert.is_resolved,
+                   Appointment.appointment_date):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+def _upsert(rows, replace=False):
+    table = DashboardCounter.__table__
+    insert = (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(table)
+    value = insert.excluded.value if replace else table.c.value + insert.excluded.value
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"value": value, "updated_at": insert.excluded.updated_at},
+        ),
+        rows,
+    )
+
+
+@event.listens_for(db.session, "before_commit")
+def _apply_counter_deltas(session):
+    session.flush()
+    deltas = session.info.pop("counter_deltas", None)
+    if not deltas:
+        return
+    now = datetime.now(timezone.utc)
+    _upsert([{"name": name, "value": delta, "updated_at": now} for name, delta in deltas.items() if delta])
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_counter_deltas(session):
+    session.info.pop("counter_deltas", None)
+
+
+def dashboard_summary(today=None):
+    """Read the dashboard figures from the counters table in one query."""
+    today = today or date.today()
+    rows = db.session.execute(
+        db.select(DashboardCounter.name, DashboardCounter.value).where(
+            DashboardCounter.name.in_(("revenue", "pending_orders", "low_stock_alerts"))
+            | DashboardCounter.name.between(appointment_key(today), f"{APPOINTMENT_PREFIX}9999-12-31")
+        )
+    ).all()
+    values = dict(rows)
+    return {
+        "revenue": values.get("revenue", 0),
+        "pending_orders": values.get("pending_orders", 0),
+        "low_stock_alerts": values.get("low_stock_alerts", 0),
+        "upcoming_appointments": sum(v for name, v in rows if name.startswith(APPOINTMENT_PREFIX)),
+    }
+
+
+def reconcile_counters(today=None):
+    """Recompute every counter from the source tables and overwrite drift,
+    e.g. from bulk writes that bypass the session events. Past appointment
+    days are dropped."""
+    today = today or date.today()
+    counts = {
+        "revenue": db.session.scalar(
+            db.select(func.coalesce(func.sum(Payment.amount), 0)).where(Payment.status == "success")),
+        "pending_orders": db.session.scalar(
+            db.select(func.count()).select_from(Order).where(Order.status == "Pending")),
+        "low_stock_alerts": db.session.scalar(
+            db.select(func.count()).select_from(InventoryAlert).where(InventoryAlert.is_resolved.is_(False))),
+    }
+    day = func.date(Appointment.appointment_date)
+    for appointment_day, count in db.session.execute(
+        db.select(day, func.count()).where(Appointment.appointment_date >= datetime.combine(today, datetime.min.time()))
+        .group_by(day)
+    ):
+        counts[appointment_key(date.fromisoformat(str(appointment_day)))] = count
+
+    #the counters are rewritten here, so deltas from this session would double count
+    db.session.info.pop("counter_deltas", None)
+    db.session.execute(db.delete(DashboardCounter).where(
+        DashboardCounter.name.startswith(APPOINTMENT_PREFIX)
+    ))
+    now = datetime.now(timezone.utc)
+    _upsert([{"name": name, "value": value, "updated_at": now} for name, value in counts.items()], replace=True)
+    db.session.commit()
+    return counts
+
+
+if __name__ == "__main__":
+    # Usage: python dashboard.py [--once]   (reconciles every DASHBOARD_RECONCILE_INTERVAL seconds)
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        with app.app_context():
+            counts = reconcile_counters()
+        logger.info("dashboard counters reconciled: %s", counts)
+        if "--once" in sys.argv:
+            break
+        time.sleep(app.config["DASHBOARD_RECONCILE_INTERVAL"])
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from config import app
+
+
+app.config.setdefault("HASH_POOL", "thread")  # or "process" to keep bcrypt off the GIL entirely
+app.config.setdefault("HASH_WORKERS", 2)
+app.config.setdefault("HASH_QUEUE_DEPTH", 16)
+app.config.setdefault("HASH_TIMEOUT", 10)
+
+
+class HasherBusy(Exception):
+    pass
+
+
+#module-level so a process pool can pickle them
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _verify(password_hash, password):
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated pool.
+
+    At most `queue_depth` hashes may be queued or running; beyond that
+    callers get HasherBusy right away instead of tying up a request thread,
+    so a login spike cannot starve the rest of the API. A hash that is not
+    done within `timeout` seconds also raises HasherBusy."""
+
+    def __init__(self, pool, workers, queue_depth, timeout):
+        executor = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        self._pool = executor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(queue_depth)
+        self.timeout = timeout
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Too many password operations in progress")
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            #drop it if it never started; a running hash keeps its slot until done
+            future.cancel()
+            raise HasherBusy("Password operation timed out")
+
+    def hash(self, password):
+        rounds = app.config["BCRYPT_LOG_ROUNDS"]
+        return self._run(_hash, password.encode("utf-8"), rounds).decode("utf-8")
+
+    def verify(self, password_hash, password):
+        return self._run(_verify, password_hash.encode("utf-8"), password.encode("utf-8"))
+
+
+hasher = PasswordHasher(
+    app.config["HASH_POOL"],
+    app.config["HASH_WORKERS"],
+    app.config["HASH_QUEUE_DEPTH"],
+    app.config["HASH_TIMEOUT"],
+)
+
+
+def needs_rehash(password_hash):
+    #bcrypt hashes look like $2b$<rounds>$<salt+digest>
+    try:
+        rounds = int(password_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != app.config["BCRYPT_LOG_ROUNDS"]
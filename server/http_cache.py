@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import request
+from werkzeug.http import http_date
+
+from config import app
+from versions import VERSIONED_TABLES, table_versions, version_stamp
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+
+
+def conditional(*tables):
+    """ETag/Last-Modified for a Resource.get whose payload only depends on
+    the given tables and the query string. Answers 304 before the
+    handler runs, so nothing is queried or serialized.
+
+    The ETag, built from the table versions, decides: Last-Modified is
+    only informational, since its one-second resolution cannot tell
+    apart two writes in the same second, so If-Modified-Since alone
+    never yields a 304."""
+    unversioned = set(tables) - VERSIONED_TABLES
+    if unversioned:
+        raise ValueError(f"add {', '.join(sorted(unversioned))} to versions.VERSIONED_TABLES")
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            versions = table_versions(*tables)
+            tag = hashlib.sha1(f"{request.full_path}|{version_stamp(versions)}".encode("utf-8")).hexdigest()
+
+            headers = {"ETag": f'W/"{tag}"', "Cache-Control": "no-cache"}
+            modified = [
+                updated_at if updated_at.tzinfo else updated_at.replace(tzinfo=timezone.utc)
+                for _, updated_at in versions.values() if updated_at is not None
+            ]
+            last_modified = max(modified).replace(microsecond=0) if modified else None
+            if last_modified:
+                headers["Last-Modified"] = http_date(last_modified)
+
+            if request.if_none_match.contains_weak(tag):
+                return "", 304, headers
+
+            result = f(*args, **kwargs)
+            if isinstance(result, tuple) and result[1] == 200:
+                return result[0], 200, {**(result[2] if len(result) > 2 else {}), **headers}
+            return result
+        return decorated_function
+    return decorator
+
+
+@app.after_request
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype != "application/json"):
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        encoding = "br"
+    elif accepted["gzip"]:
+        encoding = "gzip"
+    else:
+        return response
+
+    data = response.get_data()
+    if len(data) < app.config["COMPRESS_MIN_SIZE"]:
+        return response
+    if encoding == "br":
+        data = brotli.compress(data)
+    else:
+        data = gzip.compress(data, compresslevel=app.config["COMPRESS_GZIP_LEVEL"])
+
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
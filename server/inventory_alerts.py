@@ -0,0 +1,149 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, inspect, func, case, true
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from models import Product, InventoryAlert, StockChange
+from dashboard import add_to_counters
+
+
+app.config.setdefault("INVENTORY_DEFAULT_THRESHOLD", 5)  # for products without a configured alert
+app.config.setdefault("INVENTORY_ALERT_BATCH_SIZE", 500)
+app.config.setdefault("INVENTORY_ALERT_POLL_INTERVAL", 2.0)
+
+logger = logging.getLogger(__name__)
+
+# Writers only record which products changed (one stock_changes row each,
+# in the same transaction); the worker below evaluates them in batches
+# with one set-based upsert, so checkout never reads or writes alerts.
+
+
+def stock_changed(session, product_ids):
+    """Queue products for re-evaluation; written when the session commits."""
+    session.info.setdefault("stock_changed", set()).update(product_ids)
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_stock_changes(session, flush_context):
+    changed = set()
+    for obj in session.new:
+        if isinstance(obj, (Product, InventoryAlert)):
+            changed.add(obj.id if isinstance(obj, Product) else obj.product_id)
+    for obj in session.dirty:
+        if isinstance(obj, Product) and inspect(obj).attrs.stock_quantity.history.has_changes():
+            changed.add(obj.id)
+        elif isinstance(obj, InventoryAlert) and inspect(obj).attrs.threshold.history.has_changes():
+            changed.add(obj.product_id)
+    changed.discard(None)
+    if changed:
+        stock_changed(session, changed)
+
+
+@event.listens_for(db.session, "before_commit")
+def _record_stock_changes(session):
+    session.flush()
+    changed = session.info.pop("stock_changed", None)
+    if changed:
+        session.execute(db.insert(StockChange), [{"product_id": product_id} for product_id in sorted(changed)])
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_stock_changes(session):
+    session.info.pop("stock_changed", None)
+
+
+def _unresolved(product_ids):
+    return db.session.scalar(
+        db.select(func.count()).select_from(InventoryAlert)
+        .where(InventoryAlert.product_id.in_(product_ids), InventoryAlert.is_resolved.is_(False))
+    )
+
+
+def evaluate_products(product_ids):
+    """Bring the alerts for these products up to date in one upsert.
+
+    A product is low when its stock is at or below its alert's threshold,
+    or INVENTORY_DEFAULT_THRESHOLD if it has no alert yet; low products
+    without an alert get one. triggered_at is kept while an alert stays
+    open and cleared when it resolves. The caller commits."""
+    product_ids = sorted(product_ids)
+    if not product_ids:
+        return
+    before = _unresolved(product_ids)
+
+    now = datetime.now(timezone.utc)
+    threshold = func.coalesce(InventoryAlert.threshold, app.config["INVENTORY_DEFAULT_THRESHOLD"])
+    stock = func.coalesce(Product.stock_quantity, 0)
+    low = stock <= threshold
+    select = (
+        db.select(Product.id, threshold, stock, ~low, case((low, now), else_=None))
+        .select_from(Product)
+        .outerjoin(InventoryAlert, InventoryAlert.product_id == Product.id)
+        .where(Product.id.in_(product_ids), InventoryAlert.id.isnot(None) | low)
+    )
+    table = InventoryAlert.__table__
+    insert = (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(table)
+    db.session.execute(
+        insert.from_select(["product_id", "threshold", "current_stock", "is_resolved", "triggered_at"], select)
+        .on_conflict_do_update(
+            index_elements=[table.c.product_id],
+            set_={
+                "current_stock": insert.excluded.current_stock,
+                "is_resolved": insert.excluded.is_resolved,
+                "triggered_at": case(
+                    (insert.excluded.is_resolved == true(), None),
+                    else_=func.coalesce(table.c.triggered_at, insert.excluded.triggered_at),
+                ),
+            },
+        )
+    )
+    #the Core upsert bypasses the dashboard's session events
+    delta = _unresolved(product_ids) - before
+    if delta:
+        add_to_counters(db.session, {"low_stock_alerts": delta})
+
+
+def evaluate_batch(limit=None):
+    """Evaluate up to `limit` queued stock changes in one transaction.
+    Returns the number of distinct products evaluated."""
+    limit = limit or app.config["INVENTORY_ALERT_BATCH_SIZE"]
+    events = db.session.execute(
+        db.select(StockChange.id, StockChange.product_id)
+        .order_by(StockChange.id)
+        .limit(limit)
+        #lets several workers share the queue on Postgres; ignored by SQLite
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not events:
+        return 0
+    product_ids = {product_id for _, product_id in events}
+    evaluate_products(product_ids)
+    db.session.execute(db.delete(StockChange).where(StockChange.id.in_([event_id for event_id, _ in events])))
+    db.session.commit()
+    return len(product_ids)
+
+
+def run_worker(poll_interval=None):
+    """Drain the stock change queue forever, sleeping when it is empty."""
+    poll_interval = poll_interval or app.config["INVENTORY_ALERT_POLL_INTERVAL"]
+    while True:
+        with app.app_context():
+            try:
+                evaluated = evaluate_batch()
+            except Exception:
+                db.session.rollback()
+                logger.exception("Inventory alert batch failed")
+                evaluated = 0
+        if evaluated:
+            logger.info("Inventory alerts: evaluated %d products", evaluated)
+        else:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    # Usage: python inventory_alerts.py   (runs alongside the web workers)
+    logging.basicConfig(level=logging.INFO)
+    run_worker()
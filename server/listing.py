@@ -0,0 +1,163 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, func
+
+from loaders import eager
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class ListingError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ListingError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 3:
+        raise ListingError("Invalid cursor")
+    return values
+
+
+def int_arg(args, name, default=None, minimum=None):
+    value = args.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ListingError(f"{name} must be an integer")
+    if minimum is not None and value < minimum:
+        raise ListingError(f"{name} must be >= {minimum}")
+    return value
+
+
+def bool_arg(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ListingError(f"{name} must be true or false")
+
+
+def local_datetime(value):
+    """Parse an ISO datetime as the naive local time the schedule uses;
+    one with an offset (e.g. ...Z) is converted to local time first."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def utc_datetime(value):
+    """Parse an ISO datetime as the naive UTC that timestamp columns hold;
+    one with an offset (e.g. ...Z) is converted to UTC first."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def date_arg(args, name, end=False, parse=utc_datetime):
+    """An ISO date or datetime query argument; pass parse=local_datetime
+    for values on the appointment schedule."""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse(value)
+    except ValueError:
+        raise ListingError(f"{name} must be an ISO date or datetime")
+    #a bare date as the upper bound includes that whole day
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def keyset_page(query, sort_name, sort_column, id_column, args, descending=False):
+    """Apply the cursor in args to query and return (rows, next_cursor).
+
+    Rows are ordered by (sort_column, id_column) so the cursor can seek
+    straight to the last row seen instead of counting an OFFSET."""
+    limit = min(int_arg(args, "limit", DEFAULT_LIMIT, minimum=1), MAX_LIMIT)
+
+    token = args.get("cursor")
+    if token:
+        cursor_sort, last_value, last_id = decode_cursor(token)
+        if cursor_sort != sort_name:
+            raise ListingError("Cursor does not match sort order")
+        if descending:
+            after = or_(sort_column < last_value, and_(sort_column == last_value, id_column < last_id))
+        else:
+            after = or_(sort_column > last_value, and_(sort_column == last_value, id_column > last_id))
+        query = query.filter(after)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    #fetch one extra row to know whether another page exists
+    rows = query.add_columns(sort_column).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_value = rows[-1]
+        next_cursor = encode_cursor([sort_name, last_value, last.id])
+    return [row for row, _ in rows], next_cursor
+
+
+def list_catalog(model, args, price_column, stock_column=None):
+    """Filter, sort and keyset-paginate a catalog model (Product or Service).
+
+    Supported query args: category_id, min_price, max_price, in_stock
+    (only when the model tracks stock), sort (id, name, price; prefix
+    with "-" for descending), limit and cursor."""
+    query = model.query.options(*eager(model))
+
+    category_id = int_arg(args, "category_id")
+    if category_id is not None:
+        query = query.filter(model.category_id == category_id)
+
+    min_price = int_arg(args, "min_price", minimum=0)
+    if min_price is not None:
+        query = query.filter(price_column >= min_price)
+    max_price = int_arg(args, "max_price", minimum=0)
+    if max_price is not None:
+        query = query.filter(price_column <= max_price)
+
+    in_stock = bool_arg(args, "in_stock")
+    if in_stock is not None and stock_column is not None:
+        if in_stock:
+            query = query.filter(stock_column > 0)
+        else:
+            query = query.filter(or_(stock_column == None, stock_column <= 0))  # noqa: E711
+
+    sort = args.get("sort") or "id"
+    descending = sort.startswith("-")
+    sort_name = sort.lstrip("-")
+    sort_columns = {
+        "id": model.id,
+        "name": model.name,
+        #price is nullable; treat missing prices as 0 so the keyset stays total
+        "price": func.coalesce(price_column, 0),
+    }
+    if sort_name not in sort_columns:
+        raise ListingError(f"sort must be one of {sorted(sort_columns)}")
+
+    return keyset_page(query, sort, sort_columns[sort_name], model.id, args, descending=descending)
@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_login_storm.db")
+
+from werkzeug.serving import make_server
+
+from config import app, db
+import app as routes  # noqa: F401  registers the resources
+from models import Role, User, Category
+
+# Measures /categories latency on a threaded local server, first idle and
+# then while many clients hammer /login, to show that bcrypt work is
+# bounded by the hashing pool instead of starving catalog requests.
+# Usage: python load_login_storm.py [login_threads] [seconds]
+
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def sample_latency(url, seconds):
+    samples = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        request(url)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summary(samples):
+    cuts = statistics.quantiles(samples, n=100)
+    return f"n={len(samples)} p50={cuts[49]:.1f}ms p95={cuts[94]:.1f}ms p99={cuts[98]:.1f}ms"
+
+
+def login_storm(url, stop, statuses, lock):
+    while not stop.is_set():
+        status = request(url, {"username": "storm", "password": "storm-password"})
+        with lock:
+            statuses[status] += 1
+        if status == 503:
+            #well-behaved clients honour Retry-After
+            stop.wait(1)
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    app.secret_key = app.secret_key or "login-storm"
+    app.logger.disabled = True
+    logging.getLogger("werkzeug").disabled = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Role(id=1, name="Admin"), Role(id=2, name="Customer")])
+        db.session.add(Category(name="Food", category_type="Product"))
+        user = User(username="storm", email="storm@vetty.test", role_id=2)
+        user.password = "storm-password"
+        db.session.add(user)
+        db.session.commit()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    idle = sample_latency(f"{base}/categories", seconds)
+    print(f"/categories idle:        {summary(idle)}")
+
+    stop, statuses, lock = threading.Event(), Counter(), threading.Lock()
+    storm = [threading.Thread(target=login_storm, args=(f"{base}/login", stop, statuses, lock)) for _ in range(threads)]
+    for t in storm:
+        t.start()
+    busy = sample_latency(f"{base}/categories", seconds)
+    stop.set()
+    for t in storm:
+        t.join()
+    server.shutdown()
+
+    print(f"/categories login storm: {summary(busy)}")
+    print(f"/login responses ({threads} threads): {dict(statuses)}")
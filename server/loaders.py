@@ -0,0 +1,27 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def _loader(parent, relationship):
+    #many-to-one rides along in the same SELECT; collections get one IN query each
+    strategy = "selectinload" if relationship.uselist else "joinedload"
+    attr = relationship.class_attribute
+    if parent is None:
+        return joinedload(attr) if strategy == "joinedload" else selectinload(attr)
+    return getattr(parent, strategy)(attr)
+
+
+def eager(model, *paths):
+    """Loader options for everything model.to_dict() walks.
+
+    Paths come from model.serialize_loaders (declared next to
+    serialize_rules) plus any extra dotted paths, e.g. "order_items.product"."""
+    options = []
+    for path in (*getattr(model, "serialize_loaders", ()), *paths):
+        option, mapper = None, inspect(model)
+        for key in path.split("."):
+            relationship = mapper.relationships[key]
+            option = _loader(option, relationship)
+            mapper = relationship.mapper
+        options.append(option)
+    return options
@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request, request_finished
+from flask_restful.representations.json import output_json
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import app, api
+
+
+app.config.setdefault("METRICS_ENABLED", True)
+app.config.setdefault("METRICS_SLOW_REQUEST_MS", 500)  # None turns the slow-request log off
+app.config.setdefault("METRICS_SLOW_REQUEST_STATEMENTS", 5)  # slowest statements logged per slow request
+
+logger = logging.getLogger(__name__)
+
+# Per-process registry, exposed in the Prometheus text format. Under
+# gunicorn every worker keeps its own figures, so scrape each worker or
+# aggregate with sum() by (endpoint) across instances.
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENTS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+#keeps the slow-request log from holding on to every statement of a huge request
+MAX_RECORDED_STATEMENTS = 200
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name, self.help, self.buckets = name, help, buckets
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * len(self.buckets), 0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self.series.items())
+        for labels, (counts, total, count) in series:
+            label = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            for bound, bucket in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            label = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            lines.append(f"{self.name}{{{label}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUESTS = CounterMetric("vetty_http_requests_total", "Requests by endpoint and status.")
+LATENCY = Histogram("vetty_http_request_duration_seconds", "Time to build the response.", SECONDS)
+SQL_STATEMENTS = Histogram("vetty_http_sql_statements", "SQL statements executed per request.", STATEMENTS)
+SQL_SECONDS = Histogram("vetty_http_sql_duration_seconds", "Time spent in SQL per request.", SECONDS)
+SERIALIZE_SECONDS = Histogram("vetty_http_serialize_duration_seconds",
+                              "Time spent serializing models and encoding JSON per request.", SECONDS)
+RESPONSE_BYTES = Histogram("vetty_http_response_bytes", "Response body size as sent (after compression).", BYTES)
+METRICS = (REQUESTS, LATENCY, SQL_STATEMENTS, SQL_SECONDS, SERIALIZE_SECONDS, RESPONSE_BYTES)
+
+
+def _tracking():
+    return has_request_context() and "metrics_start" in g
+
+
+@contextmanager
+def timed_serialization():
+    """Count the enclosed block as serialization time for this request."""
+    if not _tracking() or g.get("metrics_serializing"):
+        yield
+        return
+    g.metrics_serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.metrics_serialize += time.perf_counter() - start
+        g.metrics_serializing = False
+
+
+@app.before_request
+def _start_request():
+    if app.config["METRICS_ENABLED"]:
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+        g.metrics_serialize = 0.0
+        g.metrics_statements = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _tracking():
+        conn.info.setdefault("metrics_query_start", []).append((cursor, time.perf_counter()))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _statement_done(conn, cursor, statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _statement_failed(exception_context):
+    #a failed statement never reaches after_cursor_execute
+    context = exception_context.execution_context
+    if exception_context.connection is not None and context is not None:
+        _statement_done(exception_context.connection, context.cursor, exception_context.statement)
+
+
+def _statement_done(conn, cursor, statement):
+    starts = conn.info.get("metrics_query_start")
+    #errors raised before the cursor ran pushed nothing
+    if not starts or starts[-1][0] is not cursor:
+        return
+    elapsed = time.perf_counter() - starts.pop()[1]
+    if not _tracking():
+        return
+    g.metrics_sql_count += 1
+    g.metrics_sql_time += elapsed
+    if app.config["METRICS_SLOW_REQUEST_MS"] is not None:
+        statements = g.metrics_statements
+        statements.append((elapsed, statement))
+        if len(statements) > MAX_RECORDED_STATEMENTS:
+            statements.sort(key=lambda s: s[0], reverse=True)
+            del statements[app.config["METRICS_SLOW_REQUEST_STATEMENTS"]:]
+
+
+@api.representation("application/json")
+def _timed_output_json(data, code, headers=None):
+    with timed_serialization():
+        return output_json(data, code, headers)
+
+
+def _record_request(sender, response, **extra):
+    #runs after every after_request hook, so the size is the compressed one
+    if not _tracking() or request.endpoint == "metrics":
+        return
+    elapsed = time.perf_counter() - g.metrics_start
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = (("endpoint", endpoint), ("method", request.method))
+
+    REQUESTS.inc(labels + (("status", response.status_code),))
+    LATENCY.observe(labels, elapsed)
+    SQL_STATEMENTS.observe(labels, g.metrics_sql_count)
+    SQL_SECONDS.observe(labels, g.metrics_sql_time)
+    SERIALIZE_SECONDS.observe(labels, g.metrics_serialize)
+    #streamed bodies (exports) have no length until they are sent
+    if not response.is_streamed:
+        RESPONSE_BYTES.observe(labels, response.calculate_content_length() or 0)
+
+    threshold = app.config["METRICS_SLOW_REQUEST_MS"]
+    if threshold is not None and elapsed * 1000 >= threshold:
+        slowest = sorted(g.metrics_statements, key=lambda s: s[0], reverse=True)
+        logger.warning(
+            "Slow request %s %s -> %s in %.0fms (%d SQL statements, %.0fms SQL, %.0fms serializing)%s",
+            request.method, request.full_path.rstrip("?"), response.status_code, elapsed * 1000,
+            g.metrics_sql_count, g.metrics_sql_time * 1000, g.metrics_serialize * 1000,
+            "".join(f"\n  {seconds * 1000:.1f}ms  {' '.join(statement.split())}"
+                    for seconds, statement in slowest[:app.config["METRICS_SLOW_REQUEST_STATEMENTS"]]),
+        )
+
+
+request_finished.connect(_record_request, app)
+
+
+def metrics_response():
+    """The registry in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return Response("\n".join(lines) + "\n", content_type="text/plain; version=0.0.4; charset=utf-8",
+                    headers={"Cache-Control": "no-store"})
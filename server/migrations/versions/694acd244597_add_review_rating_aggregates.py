@@ -0,0 +1,45 @@
+"""add review rating aggregates
+
+Revision ID: 694acd244597
+Revises: 7c9bb4643357
+Create Date: 2026-10-18 21:10:42.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '694acd244597'
+down_revision = '7c9bb4643357'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('review_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+TARGETS = (('products', 'product_id'), ('services', 'service_id'))
+
+
+def upgrade():
+    for table, _ in TARGETS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in COLUMNS:
+                batch_op.add_column(sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    #backfill from the reviews already in the table
+    for table, key in TARGETS:
+        def total(expression):
+            return f"(SELECT COALESCE(SUM({expression}), 0) FROM reviews WHERE reviews.{key} = {table}.id)"
+        buckets = ", ".join(
+            f"rating_{n} = {total(f'CASE WHEN rating = {n} THEN 1 ELSE 0 END')}" for n in range(1, 6)
+        )
+        op.execute(f"UPDATE {table} SET review_count = {total('1')}, rating_sum = {total('rating')}, {buckets}")
+
+
+def downgrade():
+    for table, _ in TARGETS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in reversed(COLUMNS):
+                batch_op.drop_column(column)
+    # SQLite batch mode rebuilds the table without its expression indexes
+    op.create_index('ix_products_price_id', 'products', [sa.text('coalesce(price, 0)'), 'id'], unique=False, if_not_exists=True)
+    op.create_index('ix_services_base_price_id', 'services', [sa.text('coalesce(base_price, 0)'), 'id'], unique=False, if_not_exists=True)
@@ -0,0 +1,68 @@
+"""add foreign key and filter indexes
+
+Revision ID: 7c9bb4643357
+Revises: 3bd44f52f8ea
+Create Date: 2026-10-18 20:05:12.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c9bb4643357'
+down_revision = '3bd44f52f8ea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_products_category_id'), 'products', ['category_id'], unique=False)
+    op.create_index(op.f('ix_products_name_id'), 'products', ['name', 'id'], unique=False)
+    op.create_index(op.f('ix_services_category_id'), 'services', ['category_id'], unique=False)
+    op.create_index(op.f('ix_services_name_id'), 'services', ['name', 'id'], unique=False)
+    op.create_index(op.f('ix_users_role_id'), 'users', ['role_id'], unique=False)
+    op.create_index(op.f('ix_appointments_appointment_date'), 'appointments', ['appointment_date'], unique=False)
+    op.create_index(op.f('ix_appointments_service_id_appointment_date'), 'appointments', ['service_id', 'appointment_date'], unique=False)
+    op.create_index(op.f('ix_appointments_user_id'), 'appointments', ['user_id'], unique=False)
+    op.create_index(op.f('ix_orders_delivery_zone_id'), 'orders', ['delivery_zone_id'], unique=False)
+    op.create_index(op.f('ix_orders_status_created_at'), 'orders', ['status', 'created_at'], unique=False)
+    op.create_index(op.f('ix_orders_user_id'), 'orders', ['user_id'], unique=False)
+    op.create_index(op.f('ix_reviews_product_id'), 'reviews', ['product_id'], unique=False)
+    op.create_index(op.f('ix_reviews_service_id'), 'reviews', ['service_id'], unique=False)
+    op.create_index(op.f('ix_reviews_user_id'), 'reviews', ['user_id'], unique=False)
+    op.create_index(op.f('ix_cart_items_product_id'), 'cart_items', ['product_id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_order_items_product_id'), 'order_items', ['product_id'], unique=False)
+    op.create_index(op.f('ix_order_status_history_order_id'), 'order_status_history', ['order_id'], unique=False)
+    op.create_index(op.f('ix_payments_appointment_id'), 'payments', ['appointment_id'], unique=False)
+    op.create_index(op.f('ix_payments_order_id'), 'payments', ['order_id'], unique=False)
+    op.create_index(op.f('ix_payments_user_id'), 'payments', ['user_id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', [sa.text('coalesce(price, 0)'), 'id'], unique=False)
+    op.create_index('ix_services_base_price_id', 'services', [sa.text('coalesce(base_price, 0)'), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_services_base_price_id', table_name='services')
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index(op.f('ix_payments_user_id'), table_name='payments')
+    op.drop_index(op.f('ix_payments_order_id'), table_name='payments')
+    op.drop_index(op.f('ix_payments_appointment_id'), table_name='payments')
+    op.drop_index(op.f('ix_order_status_history_order_id'), table_name='order_status_history')
+    op.drop_index(op.f('ix_order_items_product_id'), table_name='order_items')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index(op.f('ix_cart_items_product_id'), table_name='cart_items')
+    op.drop_index(op.f('ix_reviews_user_id'), table_name='reviews')
+    op.drop_index(op.f('ix_reviews_service_id'), table_name='reviews')
+    op.drop_index(op.f('ix_reviews_product_id'), table_name='reviews')
+    op.drop_index(op.f('ix_orders_user_id'), table_name='orders')
+    op.drop_index(op.f('ix_orders_status_created_at'), table_name='orders')
+    op.drop_index(op.f('ix_orders_delivery_zone_id'), table_name='orders')
+    op.drop_index(op.f('ix_appointments_user_id'), table_name='appointments')
+    op.drop_index(op.f('ix_appointments_service_id_appointment_date'), table_name='appointments')
+    op.drop_index(op.f('ix_appointments_appointment_date'), table_name='appointments')
+    op.drop_index(op.f('ix_users_role_id'), table_name='users')
+    op.drop_index(op.f('ix_services_name_id'), table_name='services')
+    op.drop_index(op.f('ix_services_category_id'), table_name='services')
+    op.drop_index(op.f('ix_products_name_id'), table_name='products')
+    op.drop_index(op.f('ix_products_category_id'), table_name='products')
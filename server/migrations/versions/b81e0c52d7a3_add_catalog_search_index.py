@@ -0,0 +1,53 @@
+"""add catalog search index
+
+Revision ID: b81e0c52d7a3
+Revises: 694acd244597
+Create Date: 2026-10-18 21:48:03.114520
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81e0c52d7a3'
+down_revision = '694acd244597'
+branch_labels = None
+depends_on = None
+
+TABLES = ('products', 'services')
+
+
+def upgrade():
+    #mirrors the DDL search.py attaches to create_all
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        fts = f"{table}_fts"
+        if dialect == 'sqlite':
+            insert = f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description);"
+            delete = f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);"
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"name, description, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END")
+            op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END")
+            op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF name, description ON {table} BEGIN {delete} {insert} END")
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect == 'postgresql':
+            op.execute(
+                f"CREATE INDEX ix_{table}_search ON {table} USING gin "
+                f"(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')))"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        fts = f"{table}_fts"
+        if dialect == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search")
@@ -4,19 +4,53 @@ from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.sql import func
 # from sqlalchemy.ext.associationproxy import association_proxy
 
-from config import db, bcrypt
+from config import db
+from hashing import hasher
 
 
-class Product(db.Model, SerializerMixin):
+class RatingStats:
+    """Review aggregates kept on the reviewed row so catalog payloads
+    never have to load the reviews themselves. See ratings.py."""
+
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    rating_rules = ("rating_average", "rating_histogram", "-rating_sum",
+            "-rating_1", "-rating_2", "-rating_3", "-rating_4", "-rating_5",)
+
+    @property
+    def rating_average(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    @property
+    def rating_histogram(self):
+        return {str(n): getattr(self, f"rating_{n}") or 0 for n in range(1, 6)}
+
+
+class Product(db.Model, SerializerMixin, RatingStats):
     __tablename__ = "products"
 
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String, unique=True, index=True)  # catalog import key (see catalog_import.py)
     name = db.Column(db.String, nullable=False)
     description = db.Column(db.Text)
     image_url = db.Column(db.String)
     price = db.Column(db.Integer)
     stock_quantity = db.Column(db.Integer)
-    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"))  # Link to category
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), index=True)  # Link to category
+
+    __table_args__ = (
+        db.Index("ix_products_name_id", "name", "id"),
+        #matches the COALESCE(price, 0) keyset used by listing.list_catalog
+        db.Index("ix_products_price_id", func.coalesce(price, 0), id),
+    )
 
     reviews = db.relationship("Review", back_populates="product", cascade="all, delete-orphan")
     category = db.relationship("Category", back_populates="products")
@@ -40,34 +74,58 @@ class Product(db.Model, SerializerMixin):
 
 
 
-    serialize_rules = ("-reviews.product", "-category.products", "-inventory_alert.product", "-cart_items.product", "-order_items.product",)  #"-inventory_alert_obj", "-category_name", "threshold"
+    serialize_rules = ("-reviews", "-category.products", "-category.services", "-inventory_alert.product", "-cart_items", "-order_items",) + RatingStats.rating_rules  #"-inventory_alert_obj", "-category_name", "threshold"
+    serialize_loaders = ("category", "inventory_alert",)
 
 
-class Service(db.Model, SerializerMixin):
+class Service(db.Model, SerializerMixin, RatingStats):
     __tablename__ = "services"
 
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String, unique=True, index=True)  # catalog import key (see catalog_import.py)
     name = db.Column(db.String, nullable=False)
     description = db.Column(db.Text)
     image_url = db.Column(db.String)
     base_price = db.Column(db.Integer)
-    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"))  # Link to category
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), index=True)  # Link to category
+    #bookable slots: every slot_minutes from opening_hour to closing_hour, slot_capacity appointments each
+    slot_minutes = db.Column(db.Integer, nullable=False, default=60, server_default="60")
+    slot_capacity = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    opening_hour = db.Column(db.Integer, nullable=False, default=9, server_default="9")
+    closing_hour = db.Column(db.Integer, nullable=False, default=17, server_default="17")
+
+    __table_args__ = (
+        db.Index("ix_services_name_id", "name", "id"),
+        db.Index("ix_services_base_price_id", func.coalesce(base_price, 0), id),
+    )
 
     reviews = db.relationship("Review", back_populates="service", cascade="all, delete-orphan")
     category = db.relationship("Category", back_populates="services")
     appointments = db.relationship("Appointment", back_populates="service", )
 
-    serialize_rules=( "-reviews.user", "-category.services", "-appointments.service",)
+    serialize_rules=( "-reviews", "-category.services", "-category.products", "-appointments",) + RatingStats.rating_rules
+    serialize_loaders = ("category",)
+
+    @validates("slot_minutes", "slot_capacity", "opening_hour", "closing_hour")
+    def validate_slots(self, key, value):
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"{key} must be an integer")
+        if key in ("slot_minutes", "slot_capacity") and value < 1:
+            raise ValueError(f"{key} must be at least 1")
+        if key in ("opening_hour", "closing_hour") and not 0 <= value <= 24:
+            raise ValueError(f"{key} must be between 0 and 24")
+        return value
+
 class Review(db.Model, SerializerMixin):
     __tablename__ = "reviews"
 
     id = db.Column(db.Integer, primary_key=True)
     comment = db.Column(db.Text)
     rating = db.Column(db.Integer)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
     #can  either of them be null 
-    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=True)
-    service_id = db.Column(db.Integer, db.ForeignKey("services.id"), nullable=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=True, index=True)
+    service_id = db.Column(db.Integer, db.ForeignKey("services.id"), nullable=True, index=True)
 
     user = db.relationship("User", back_populates="reviews")
 
@@ -75,18 +133,19 @@ class Review(db.Model, SerializerMixin):
 
     service = db.relationship("Service", back_populates="reviews")
 
-    serialize_rules = ("-user.reviews", "-product.reviews", "-service.reviews", )
+    serialize_rules = ("-user.reviews", "-user.role", "-product", "-service", )
+    serialize_loaders = ("user",)
     
     @validates("rating")
     def validate_rating(self, key,value):
-        if not 1 <= value <=5:
-            raise ValueError("Rating must be between 1 and 5")
+        if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <=5:
+            raise ValueError("Rating must be an integer between 1 and 5")
         return value
     @validates("product_id", "service_id") 
     def validate_target(self,key, value):
-        if not (self.product_id or self.service_id):
-            raise ValueError("Review must belong to a product or service")
-        if self.product_id and self.service_id:
+        #the other target may not be assigned yet, so only reject both being set
+        other = self.service_id if key == "product_id" else self.product_id
+        if value and other:
             raise ValueError("Review cannot belong to both")
         return value        
 
@@ -102,7 +161,8 @@ class Category(db.Model, SerializerMixin):
     products = db.relationship("Product", back_populates="category")
     services = db.relationship("Service", back_populates="category")
 
-    serialize_rules = ("-products.category", "-services.category",)
+    serialize_rules = ("-products", "-services",)
+    serialize_loaders = ()
 
     @validates("category_type")
     def validate_category(self,key,value):
@@ -121,7 +181,8 @@ class DeliveryZone(db.Model, SerializerMixin):
 
     orders = db.relationship("Order", back_populates="delivery_zone")
 
-    serialize_rules = ("-orders.delivery_zone",)
+    serialize_rules = ("-orders",)
+    serialize_loaders = ()
 
 
 # Admin: inventory alerts for low-stock items
@@ -131,23 +192,31 @@ class InventoryAlert(db.Model, SerializerMixin):
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey("products.id"), unique=True)
     threshold = db.Column(db.Integer, nullable=False)
-    
+    #maintained by the background evaluator in inventory_alerts.py
+    current_stock = db.Column(db.Integer, nullable=True)
+    is_resolved = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    triggered_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
 
     product = db.relationship("Product", back_populates="inventory_alert")
 
 
-    serialize_rules = ("-product.inventory_alert",)
+    serialize_rules = ("-product.inventory_alert", "-product.reviews", "-product.category",)
+    serialize_loaders = ("product",)
 
 
 class Order(db.Model, SerializerMixin):
     __tablename__ = "orders"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
-    delivery_zone_id = db.Column(db.Integer, db.ForeignKey("delivery_zones.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+    delivery_zone_id = db.Column(db.Integer, db.ForeignKey("delivery_zones.id"), index=True)
     status = db.Column(db.String, nullable=False)
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        db.Index("ix_orders_status_created_at", "status", "created_at"),
+    )
     #total amount calculates as a hybrid property
 
     #relationships
@@ -159,46 +228,62 @@ class Order(db.Model, SerializerMixin):
     delivery_zone = db.relationship("DeliveryZone", back_populates="orders")
     
 
-    serialize_rules = ("total_amount", "-user.orders", "-order_items.order", "-history.order", "-payments.order", "-delivery_zone.orders", "-order_items.product.order_items",)
+    serialize_rules = ("total_amount", "-user.orders", "-user.role", "-order_items.order", "-history.order", "-payments.order", "-payments.user", "-payments.appointment", "-delivery_zone.orders", "-order_items.product.order_items", "-order_items.product.reviews", "-order_items.product.category", "-order_items.product.inventory_alert",)
+    serialize_loaders = ("user", "order_items.product", "history", "payments", "delivery_zone",)
 
     @validates("status")
     def validate_status(self, key,value):
-        if value not in ["Pending", "Approved", "Out for Delivery", "Delivered"]:
+        if value not in ["Pending", "Approved", "Out for Delivery", "Delivered", "Cancelled"]:
             raise ValueError("Invalid entry")
         return value 
     @hybrid_property
     def total_amount(self):
         return sum(item.subtotal for item in self.order_items)
 
+    @total_amount.expression
+    def total_amount(cls):
+        #correlated subquery so orders can be filtered/sorted by total in SQL
+        return (
+            db.select(func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0))
+            .where(OrderItem.order_id == cls.id)
+            .correlate_except(OrderItem)
+            .scalar_subquery()
+        )
+
 
 
 class OrderItem(db.Model, SerializerMixin):
     __tablename__ = "order_items"
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"))
-    product_id = db.Column(db.Integer, db.ForeignKey("products.id"))
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), index=True)
     quantity = db.Column(db.Integer, default=1)
     unit_price = db.Column(db.Integer, nullable=False) 
 
     order = db.relationship("Order", back_populates="order_items")
     product = db.relationship("Product", back_populates="order_items")
 
-    serialize_rules = ("subtotal", "-order.order_items", "-product.order_items",)
+    serialize_rules = ("subtotal", "-order", "-product.order_items", "-product.reviews", "-product.category", "-product.inventory_alert",)
+    serialize_loaders = ("product",)
 
 
     @hybrid_property
     def subtotal(self):
         return self.quantity * self.unit_price
 
+    @subtotal.expression
+    def subtotal(cls):
+        return cls.quantity * cls.unit_price
+
 
 class Payment(db.Model, SerializerMixin):
     __tablename__ = "payments"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=True)
-    appointment_id = db.Column(db.Integer, db.ForeignKey("appointments.id"), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=True, index=True)
+    appointment_id = db.Column(db.Integer, db.ForeignKey("appointments.id"), nullable=True, index=True)
     payment_method = db.Column(db.String, nullable=False)
 
     
@@ -210,7 +295,7 @@ class Payment(db.Model, SerializerMixin):
     # amount = db.Column(db.Float, nullable=False)
     mpesa_receipt_number = db.Column(db.String, unique=True, nullable=True)#recieved from callbak    #transaction_reference
     status = db.Column(db.String, default="pending")#pending ,success, failed
-    paid_at = db.Column(db.DateTime(timezone=True), server_default=func.now()) #paid at
+    paid_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), index=True) #paid at
 
 
     appointment = db.relationship("Appointment", back_populates="payments")
@@ -218,7 +303,8 @@ class Payment(db.Model, SerializerMixin):
     user = db.relationship("User", back_populates="payments")
 
 
-    serialize_rules = ("-order.payments", "-appointment.payments", "-user.payments")
+    serialize_rules = ("-order", "-appointment", "-user")
+    serialize_loaders = ()
 
 
     @validates('payment_method')
@@ -229,9 +315,9 @@ class Payment(db.Model, SerializerMixin):
         return method
     @validates("order_id", "appointment_id")
     def validate_target(self, key, value):
-        if not (self.order_id or self.appointment_id):
-            raise ValueError("Payment can be of order or appointment")    
-        if (self.order_id and self.appointment_id):
+        #the other target may not be assigned yet, so only reject both being set
+        other = self.appointment_id if key == "order_id" else self.order_id
+        if value and other:
             raise ValueError("Payment can be either of Order,or appointment not both")    
         return value    
     @validates("status")
@@ -250,7 +336,8 @@ class Cart(db.Model, SerializerMixin):
     cart_items = db.relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
     user = db.relationship("User", back_populates="carts")
 
-    serialize_rules = ("-cart_items.cart", "-user.carts")
+    serialize_rules = ("-cart_items.cart", "-cart_items.product.reviews", "-cart_items.product.category", "-cart_items.product.inventory_alert", "-user")
+    serialize_loaders = ("cart_items.product",)
 
 
 
@@ -259,18 +346,19 @@ class CartItem(db.Model, SerializerMixin):
 
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey("carts.id"))
-    product_id = db.Column(db.Integer, db.ForeignKey("products.id"))
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), index=True)
     quantity = db.Column(db.Integer, nullable=False, default=1)
 
     __table_args__ = (
-        db.UniqueConstraint("cart_id", "product_id", name="uix_cart_product")
+        db.UniqueConstraint("cart_id", "product_id", name="uix_cart_product"),
     )
 
     product = db.relationship("Product", back_populates="cart_items")
     cart  = db.relationship("Cart", back_populates="cart_items")
 
 
-    serialize_rules = ("-product.cart_items", "-cart.cart_items")
+    serialize_rules = ("-product.cart_items", "-product.reviews", "-product.category", "-product.inventory_alert", "-cart")
+    serialize_loaders = ("product",)
     @validates("quantity")
     def validate_quantity(self, key, value):
         if value < 1:
@@ -285,7 +373,8 @@ class Role(db.Model, SerializerMixin):
 
     users = db.relationship('User', back_populates="role")
 
-    serialize_rules = ('-users.role',)
+    serialize_rules = ('-users',)
+    serialize_loaders = ()
 
     def __repr__(self):
         return f"<Role {self.id} {self.name}>"
@@ -298,7 +387,7 @@ class User(db.Model, SerializerMixin):
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     _password_hash = db.Column(db.String(255), nullable=False)
-    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False)
+    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), nullable=False, index=True)
 
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -309,12 +398,10 @@ class User(db.Model, SerializerMixin):
 
     @password.setter
     def password(self, password):
-        self._password_hash = bcrypt.generate_password_hash(
-            password.encode("utf-8")
-        ).decode("utf-8")    
+        self._password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password.encode("utf-8"))
+        return hasher.verify(self._password_hash, password)
     
     appointments = db.relationship("Appointment", back_populates="user", cascade="all, delete-orphan")
     carts = db.relationship("Cart", back_populates="user", uselist=False)  #added uselist
@@ -323,7 +410,8 @@ class User(db.Model, SerializerMixin):
     reviews = db.relationship("Review", back_populates="user")
     role = db.relationship("Role", back_populates="users")
 
-    serialize_rules = ("-_password_hash","-orders.user", "-appointments.user", "-role.users", "-carts.user", "-payments.user", "-reviews.user", "-orders",)
+    serialize_rules = ("-_password_hash", "-role.users", "-orders", "-appointments", "-carts", "-payments", "-reviews",)
+    serialize_loaders = ("role",)
 
     @validates("email")    
     def validate_email(self, key, email):
@@ -338,18 +426,24 @@ class Appointment(db.Model, SerializerMixin):
     __tablename__ = "appointments"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     service_id = db.Column(db.Integer, db.ForeignKey("services.id"), nullable=False)
-    appointment_date = db.Column(db.DateTime, nullable=False)
+    appointment_date = db.Column(db.DateTime, nullable=False, index=True)
     payment_status = db.Column(db.String, default="Scheduled")
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
     notes = db.Column(db.Text)
     total_price = db.Column(db.Integer)
 
     user = db.relationship("User", back_populates="appointments")
+    service = db.relationship("Service", back_populates="appointments")
     payments = db.relationship("Payment", back_populates="appointment", cascade="all, delete-orphan")
 
-    serialize_rules = ("-user.appointments", "-service.appointments","-payments.appointment")
+    __table_args__ = (
+        db.Index("ix_appointments_service_id_appointment_date", "service_id", "appointment_date"),
+    )
+
+    serialize_rules = ("-user", "-service.appointments", "-service.reviews", "-service.category", "-payments.appointment", "-payments.order", "-payments.user")
+    serialize_loaders = ("service", "payments",)
     @validates("payment_status")
     def validate_status(self, key,value):
         if value not in ["Pending", "Approved", "Scheduled", "Completed", "Cancelled", "No-Show"]:
@@ -357,14 +451,124 @@ class Appointment(db.Model, SerializerMixin):
         return value 
 
 
+# Appointments booked per service slot, so availability is a primary key
+# range read and booking is one conditional UPDATE (see slots.py)
+class AppointmentSlot(db.Model, SerializerMixin):
+    __tablename__ = "appointment_slots"
+
+    service_id = db.Column(db.Integer, db.ForeignKey("services.id"), primary_key=True)
+    starts_at = db.Column(db.DateTime, primary_key=True)
+    booked = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
 class OrderStatusHistory(db.Model, SerializerMixin):
     __tablename__ = "order_status_history"
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     status = db.Column(db.String, nullable=False)
     changed_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
    
 
     order = db.relationship("Order", back_populates="history")
-    serialize_rules = ("-order.history",)
+    serialize_rules = ("-order",)
+    serialize_loaders = ()
+
+
+# Per-table write counters used for ETags/Last-Modified (see versions.py)
+class TableVersion(db.Model, SerializerMixin):
+    __tablename__ = "table_versions"
+
+    table_name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+
+# Durable inbox for M-Pesa (Daraja) STK callbacks (see payment_callbacks.py)
+class PaymentCallback(db.Model, SerializerMixin):
+    __tablename__ = "payment_callbacks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    checkout_request_id = db.Column(db.String, index=True)
+    payload = db.Column(db.Text, nullable=False)
+    received_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    processed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    next_attempt_at = db.Column(db.DateTime(timezone=True), nullable=True)  #backoff while the payment is missing
+    outcome = db.Column(db.String, nullable=True)  #applied, duplicate, unmatched, invalid, conflict
+
+    __table_args__ = (
+        #the worker polls "processed_at IS NULL ORDER BY id"
+        db.Index("ix_payment_callbacks_processed_at_id", "processed_at", "id"),
+    )
+
+    serialize_rules = ()
+    serialize_loaders = ()
+
+
+# Incrementally maintained admin dashboard figures (see dashboard.py)
+class DashboardCounter(db.Model, SerializerMixin):
+    __tablename__ = "dashboard_counters"
+
+    name = db.Column(db.String, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+
+# Sales rollups, maintained on checkout and status change (see rollups.py)
+class SalesHourly(db.Model, SerializerMixin):
+    __tablename__ = "sales_hourly"
+
+    hour = db.Column(db.DateTime, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class SalesDaily(db.Model, SerializerMixin):
+    __tablename__ = "sales_daily"
+
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class ProductSalesDaily(db.Model, SerializerMixin):
+    __tablename__ = "product_sales_daily"
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+#lets year-long product reports read 12 rows per product instead of 365
+class ProductSalesMonthly(db.Model, SerializerMixin):
+    __tablename__ = "product_sales_monthly"
+
+    month = db.Column(db.Date, primary_key=True)  #first day of the month
+    product_id = db.Column(db.Integer, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class ZoneSalesDaily(db.Model, SerializerMixin):
+    __tablename__ = "zone_sales_daily"
+
+    day = db.Column(db.Date, primary_key=True)
+    delivery_zone_id = db.Column(db.Integer, primary_key=True)  #0 for orders without a zone
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# Products whose stock or alert threshold changed, waiting for the
+# inventory alert evaluator (see inventory_alerts.py)
+class StockChange(db.Model, SerializerMixin):
+    __tablename__ = "stock_changes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
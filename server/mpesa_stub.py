@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_mpesa_stub.db")
+
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+# A local stand-in for the Daraja STK push API. POST
+# /mpesa/stkpush/v1/processrequest answers like Safaricom does and then
+# POSTs the stkCallback to CallBackURL, optionally failing some payments
+# and delivering some callbacks more than once.
+# Usage: python mpesa_stub.py [payments] [duplicate_rate] [fail_rate]
+# runs the whole flow against a temp database and checks the outcome.
+
+EAT = timezone(timedelta(hours=3))
+
+
+class DarajaStub:
+    def __init__(self, duplicate_rate=0.0, fail_rate=0.0, senders=16, seed=7):
+        self.duplicate_rate = duplicate_rate
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=senders)
+        self.ack_latencies = []
+        self.delivered = 0
+        self.expected = {}  # checkout_request_id -> "success" or "fail"
+
+    def callback_payload(self, merchant_request_id, checkout_request_id, amount, phone, failed):
+        callback = {
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "ResultCode": 1032 if failed else 0,
+            "ResultDesc": "Request cancelled by user" if failed else "The service request is processed successfully.",
+        }
+        if not failed:
+            callback["CallbackMetadata"] = {"Item": [
+                {"Name": "Amount", "Value": amount},
+                {"Name": "MpesaReceiptNumber", "Value": uuid.uuid4().hex[:10].upper()},
+                {"Name": "Balance"},
+                {"Name": "TransactionDate", "Value": int(datetime.now(EAT).strftime("%Y%m%d%H%M%S"))},
+                {"Name": "PhoneNumber", "Value": int(phone)},
+            ]}
+        return {"Body": {"stkCallback": callback}}
+
+    def deliver(self, url, payload):
+        data = json.dumps(payload).encode("utf-8")
+        req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(req) as response:
+            response.read()
+        with self.lock:
+            self.ack_latencies.append((time.perf_counter() - start) * 1000)
+            self.delivered += 1
+
+    def stk_push(self, body):
+        merchant_request_id = f"{self.random.randint(10000, 99999)}-{self.random.randint(1000000, 9999999)}-1"
+        checkout_request_id = f"ws_CO_{uuid.uuid4().hex}"
+        with self.lock:
+            failed = self.random.random() < self.fail_rate
+            copies = 2 if self.random.random() < self.duplicate_rate else 1
+        self.expected[checkout_request_id] = "fail" if failed else "success"
+        payload = self.callback_payload(merchant_request_id, checkout_request_id,
+                                        body["Amount"], body["PhoneNumber"], failed)
+        for _ in range(copies):
+            self.pool.submit(self.deliver, body["CallBackURL"], payload)
+        return {
+            "MerchantRequestID": merchant_request_id,
+            "CheckoutRequestID": checkout_request_id,
+            "ResponseCode": "0",
+            "ResponseDescription": "Success. Request accepted for processing",
+            "CustomerMessage": "Success. Request accepted for processing",
+        }
+
+    def __call__(self, environ, start_response):
+        request = Request(environ)
+        if request.method == "POST" and request.path == "/mpesa/stkpush/v1/processrequest":
+            response = Response(json.dumps(self.stk_push(request.get_json())), mimetype="application/json")
+        else:
+            response = Response(json.dumps({"errorMessage": "Not found"}), status=404, mimetype="application/json")
+        return response(environ, start_response)
+
+
+def serve(wsgi_app):
+    server = make_server("127.0.0.1", 0, wsgi_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def post_json(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    duplicate_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    fail_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+    from config import app, db
+    import app as routes  # noqa: F401  registers the resources
+    from models import Role, User, Order, Payment, PaymentCallback
+    from payment_callbacks import process_batch
+
+    app.logger.disabled = True
+    app.config["MPESA_CALLBACK_TOKEN"] = "stub-token"
+    logging.getLogger("werkzeug").disabled = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Role(id=2, name="Customer"))
+        db.session.add(User(id=1, username="payer", email="payer@vetty.test", role_id=2, _password_hash="x"))
+        db.session.add(Order(id=1, user_id=1, status="Pending"))
+        db.session.commit()
+
+    stub = DarajaStub(duplicate_rate=duplicate_rate, fail_rate=fail_rate)
+    app_server, app_url = serve(app)
+    stub_server, stub_url = serve(stub)
+
+    #what the checkout flow does: ask Daraja for an STK push, record the pending payment
+    start = time.perf_counter()
+    rows = []
+    for i in range(count):
+        ack = post_json(f"{stub_url}/mpesa/stkpush/v1/processrequest", {
+            "Amount": 100, "PhoneNumber": "254708374149",
+            "CallBackURL": f"{app_url}/payments/mpesa/callback?token=stub-token", "AccountReference": "Vetty",
+        })
+        rows.append({"user_id": 1, "order_id": 1, "payment_method": "M-Pesa", "amount": 100, "status": "pending",
+                     "checkout_request_id": ack["CheckoutRequestID"], "merchant_request_id": ack["MerchantRequestID"]})
+    with app.app_context():
+        db.session.execute(db.insert(Payment), rows)
+        db.session.commit()
+
+    stub.pool.shutdown(wait=True)
+    ingest = time.perf_counter() - start
+    cuts = statistics.quantiles(stub.ack_latencies, n=100)
+    print(f"callbacks delivered: {stub.delivered} for {count} payments in {ingest:.2f}s "
+          f"(ack p50={cuts[49]:.1f}ms p99={cuts[98]:.1f}ms)")
+
+    with app.app_context():
+        start = time.perf_counter()
+        totals = {}
+        while True:
+            outcomes = process_batch()
+            if not outcomes:
+                break
+            for key, value in outcomes.items():
+                totals[key] = totals.get(key, 0) + value
+        elapsed = time.perf_counter() - start
+        print(f"worker: {totals} in {elapsed:.2f}s ({stub.delivered / elapsed:.0f} callbacks/s)")
+
+        actual = dict(db.session.execute(db.select(Payment.checkout_request_id, Payment.status)).all())
+        mismatched = [cid for cid, status in stub.expected.items() if actual.get(cid) != status]
+        receipts = db.session.scalar(db.select(db.func.count(Payment.mpesa_receipt_number.distinct())))
+        successes = sum(1 for status in stub.expected.values() if status == "success")
+        pending = db.session.scalar(db.select(db.func.count()).where(PaymentCallback.processed_at.is_(None)))
+
+    app_server.shutdown()
+    stub_server.shutdown()
+    ok = not mismatched and receipts == successes and not pending and totals.get("applied") == count
+    print(f"payments with the wrong status: {len(mismatched)}; receipts {receipts}/{successes}; queued {pending}")
+    print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,32 @@
+from config import db
+from models import Product, Order, OrderItem, OrderStatusHistory
+from stock import reserve_stock
+
+
+def place_order(user_id, lines):
+    """Reserve stock and build a Pending order for (product_id, quantity) lines.
+
+    Products are fetched in one IN query, and the order items and the first
+    history row go out as bulk INSERTs instead of one INSERT per object.
+    Returns (order, products by id); the caller commits."""
+    totals = {}
+    for product_id, quantity in lines:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    reserve_stock(totals)
+
+    products = {p.id: p for p in Product.query.filter(Product.id.in_(totals))}
+    new_order = Order(user_id=user_id, status="Pending")
+    db.session.add(new_order)
+    db.session.flush()
+
+    db.session.execute(db.insert(OrderItem), [
+        {
+            "order_id": new_order.id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "unit_price": products[product_id].price,
+        }
+        for product_id, quantity in lines
+    ])
+    db.session.execute(db.insert(OrderStatusHistory), [{"order_id": new_order.id, "status": "Pending"}])
+    return new_order, products
@@ -0,0 +1,221 @@
+import json
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import bindparam, func, or_
+from sqlalchemy.exc import IntegrityError
+
+from config import app, db
+from models import Payment, PaymentCallback
+from dashboard import add_to_counters
+
+
+app.config.setdefault("MPESA_CALLBACK_BATCH_SIZE", 200)
+app.config.setdefault("MPESA_CALLBACK_MAX_ATTEMPTS", 10)
+#an unmatched callback waits RETRY_DELAY seconds, doubling up to MAX_RETRY_DELAY (about 20 minutes in all)
+app.config.setdefault("MPESA_CALLBACK_RETRY_DELAY", 5)
+app.config.setdefault("MPESA_CALLBACK_MAX_RETRY_DELAY", 300)
+app.config.setdefault("MPESA_CALLBACK_POLL_INTERVAL", 1.0)
+
+# Daraja reports TransactionDate as Nairobi local time, e.g. 20191219102115
+EAT = timezone(timedelta(hours=3))
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCallback(ValueError):
+    pass
+
+
+def parse_callback(payload):
+    """Return (checkout_request_id, payment fields) for a Daraja stkCallback body."""
+    try:
+        callback = payload["Body"]["stkCallback"]
+        checkout_request_id = callback["CheckoutRequestID"]
+        result_code = int(callback["ResultCode"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCallback("Not an STK callback")
+    if not isinstance(checkout_request_id, str) or not checkout_request_id:
+        raise InvalidCallback("Missing CheckoutRequestID")
+
+    fields = {
+        "status": "success" if result_code == 0 else "fail",
+        "merchant_request_id": callback.get("MerchantRequestID"),
+        "mpesa_receipt_number": None,
+        "phone_number": None,
+        "paid_at": None,
+    }
+    if result_code == 0:
+        items = callback.get("CallbackMetadata", {}).get("Item", [])
+        values = {item.get("Name"): item.get("Value") for item in items if isinstance(item, dict)}
+        fields["mpesa_receipt_number"] = values.get("MpesaReceiptNumber")
+        if values.get("PhoneNumber"):
+            fields["phone_number"] = str(values["PhoneNumber"])
+        try:
+            #stored in UTC like the server_default timestamps; SQLite drops the offset
+            fields["paid_at"] = datetime.strptime(
+                str(values["TransactionDate"]), "%Y%m%d%H%M%S").replace(tzinfo=EAT).astimezone(timezone.utc)
+        except (KeyError, ValueError):
+            fields["paid_at"] = datetime.now(timezone.utc)
+    return checkout_request_id, fields
+
+
+def enqueue_callback(payload):
+    """Store a callback for the worker; the caller commits and acks."""
+    checkout_request_id, _ = parse_callback(payload)
+    callback = PaymentCallback(checkout_request_id=checkout_request_id, payload=json.dumps(payload))
+    db.session.add(callback)
+    return callback
+
+
+_payments = Payment.__table__
+
+#guarded on status so a replayed or concurrent callback can never apply twice
+_apply = (
+    db.update(_payments)
+    .where(_payments.c.checkout_request_id == bindparam("b_checkout_request_id"), _payments.c.status == "pending")
+    .values(
+        status=bindparam("b_status"),
+        merchant_request_id=func.coalesce(bindparam("b_merchant_request_id"), _payments.c.merchant_request_id),
+        mpesa_receipt_number=func.coalesce(bindparam("b_mpesa_receipt_number"), _payments.c.mpesa_receipt_number),
+        phone_number=func.coalesce(bindparam("b_phone_number"), _payments.c.phone_number),
+        paid_at=func.coalesce(bindparam("b_paid_at"), _payments.c.paid_at),
+    )
+)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(app.config["MPESA_CALLBACK_RETRY_DELAY"] * 2 ** (attempts - 1),
+                                 app.config["MPESA_CALLBACK_MAX_RETRY_DELAY"]))
+
+
+def _apply_updates(updates):
+    """Run the payment UPDATEs; return the updates that were rejected.
+
+    One executemany in a savepoint; if a row violates a constraint (e.g.
+    a receipt number another payment already has), retry row by row so
+    only the offending callbacks are held back."""
+    try:
+        with db.session.begin_nested():
+            db.session.execute(_apply, [params for _, params, _ in updates])
+        return []
+    except IntegrityError:
+        pass
+    rejected = []
+    for update in updates:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(_apply, [update[1]])
+        except IntegrityError as e:
+            logger.warning("M-Pesa callback %s rejected: %s", update[0].id, e.orig)
+            rejected.append(update)
+    return rejected
+
+
+def process_batch(limit=None):
+    """Apply up to `limit` due callbacks in one transaction.
+
+    Callbacks are matched to payments on checkout_request_id. Only pending
+    payments change, so Daraja's retries and duplicate deliveries are
+    recorded as "duplicate" and otherwise ignored. A callback whose payment
+    is not there yet is put back with an exponential backoff
+    (next_attempt_at) and marked "unmatched" after
+    MPESA_CALLBACK_MAX_ATTEMPTS tries. One that the payments table rejects
+    is parked as "conflict" without holding up the rest of the batch.
+    Returns a Counter of outcomes."""
+    limit = limit or app.config["MPESA_CALLBACK_BATCH_SIZE"]
+    now = datetime.now(timezone.utc)
+    callbacks = db.session.scalars(
+        db.select(PaymentCallback)
+        .where(PaymentCallback.processed_at.is_(None),
+               or_(PaymentCallback.next_attempt_at.is_(None), PaymentCallback.next_attempt_at <= now))
+        .order_by(PaymentCallback.id)
+        .limit(limit)
+        #lets several workers share the queue on Postgres; ignored by SQLite
+        .with_for_update(skip_locked=True)
+    ).all()
+    outcomes = Counter()
+    if not callbacks:
+        return outcomes
+
+    parsed = {}
+    for callback in callbacks:
+        try:
+            parsed[callback.id] = parse_callback(json.loads(callback.payload))
+        except ValueError:
+            parsed[callback.id] = None
+
+    checkout_ids = {result[0] for result in parsed.values() if result}
+    rows = db.session.execute(
+        db.select(Payment.checkout_request_id, Payment.status, Payment.amount)
+        .where(Payment.checkout_request_id.in_(checkout_ids))
+    ).all() if checkout_ids else []
+    statuses = {checkout_request_id: status for checkout_request_id, status, _ in rows}
+    amounts = {checkout_request_id: amount for checkout_request_id, _, amount in rows}
+
+    updates = []
+    for callback in callbacks:
+        callback.attempts += 1
+        result = parsed[callback.id]
+        if result is None:
+            outcome = "invalid"
+        else:
+            checkout_request_id, fields = result
+            status = statuses.get(checkout_request_id)
+            if status is None:
+                if callback.attempts < app.config["MPESA_CALLBACK_MAX_ATTEMPTS"]:
+                    callback.next_attempt_at = now + _retry_delay(callback.attempts)
+                    outcomes["retry"] += 1
+                    continue
+                outcome = "unmatched"
+            elif status == "pending":
+                updates.append((callback, {"b_checkout_request_id": checkout_request_id,
+                                           **{f"b_{key}": value for key, value in fields.items()}},
+                                (amounts[checkout_request_id] or 0) if fields["status"] == "success" else 0))
+                statuses[checkout_request_id] = fields["status"]
+                outcome = "applied"
+            else:
+                outcome = "duplicate"
+        callback.processed_at = now
+        callback.outcome = outcome
+        outcomes[outcome] += 1
+
+    rejected = _apply_updates(updates) if updates else []
+    for callback, _, _ in rejected:
+        callback.outcome = "conflict"
+        outcomes["applied"] -= 1
+        outcomes["conflict"] += 1
+    rejected_ids = {callback.id for callback, _, _ in rejected}
+    revenue = sum(amount for callback, _, amount in updates if callback.id not in rejected_ids)
+    if revenue:
+        #the Core UPDATE above bypasses the dashboard's session events
+        add_to_counters(db.session, {"revenue": revenue})
+    db.session.commit()
+    return +outcomes
+
+
+def run_worker(poll_interval=None):
+    """Drain the callback queue forever, sleeping when a pass did nothing new.
+    Callbacks waiting for their payment are only fetched again once their
+    backoff has passed."""
+    poll_interval = poll_interval or app.config["MPESA_CALLBACK_POLL_INTERVAL"]
+    while True:
+        with app.app_context():
+            try:
+                outcomes = process_batch()
+            except Exception:
+                db.session.rollback()
+                logger.exception("M-Pesa callback batch failed")
+                outcomes = None
+        if outcomes:
+            logger.info("M-Pesa callbacks: %s", dict(outcomes))
+        if not outcomes or set(outcomes) == {"retry"}:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    # Usage: python payment_callbacks.py   (runs alongside the web workers)
+    logging.basicConfig(level=logging.INFO)
+    run_worker()
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import g, session, has_app_context
+from sqlalchemy import event
+
+from config import app, db
+from models import User, Role
+
+
+app.config.setdefault("PRINCIPAL_CACHE_TTL", 30)
+
+Principal = namedtuple("Principal", "user_id role_name version")
+
+_cache = {}
+_lock = threading.Lock()
+_generation = 0
+
+
+def _load(user_id):
+    row = db.session.execute(
+        db.select(User.id, Role.name).join(Role, User.role_id == Role.id).where(User.id == user_id)
+    ).first()
+    return Principal(row[0], row[1], _generation) if row else None
+
+
+def current_principal():
+    """The logged-in user's id and role name, or None.
+
+    Memoised on flask.g for the request and in-process for
+    PRINCIPAL_CACHE_TTL seconds, so repeat requests cost no queries."""
+    user_id = session.get("user_id")
+    principal = g.get("principal")
+    if principal is not None and principal.user_id == user_id:
+        return principal
+    principal = None
+    if user_id:
+        now = time.monotonic()
+        with _lock:
+            entry = _cache.get(user_id)
+        if entry and entry[1] > now and entry[0].version == _generation:
+            principal = entry[0]
+        else:
+            principal = _load(user_id)
+            if principal:
+                with _lock:
+                    _cache[user_id] = (principal, now + app.config["PRINCIPAL_CACHE_TTL"])
+    g.principal = principal
+    return principal
+
+
+def invalidate_principal(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+    if has_app_context():
+        g.pop("principal", None)
+
+
+def invalidate_all_principals():
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+    if has_app_context():
+        g.pop("principal", None)
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_stale_principals(session, flush_context):
+    stale = session.info.setdefault("stale_principals", set())
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            stale.add(obj.id)
+        elif isinstance(obj, Role):
+            stale.add(None)
+
+
+@event.listens_for(db.session, "after_commit")
+def _drop_stale_principals(session):
+    stale = session.info.pop("stale_principals", ())
+    if None in stale:
+        invalidate_all_principals()
+        return
+    for user_id in stale:
+        invalidate_principal(user_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_stale_principals(session):
+    session.info.pop("stale_principals", None)
@@ -0,0 +1,52 @@
+from sqlalchemy import func, case
+
+from config import db
+from models import Product, Service, Review
+
+
+def _target(review):
+    if review.product_id:
+        return Product, review.product_id
+    return Service, review.service_id
+
+
+def apply_rating(model, target_id, rating, delta=1):
+    """Add (delta=1) or remove (delta=-1) one rating from a target's
+    aggregates with a single in-place UPDATE, so concurrent reviews never
+    lose counts. Returns False when the target does not exist."""
+    bucket = getattr(model, f"rating_{rating}")
+    result = db.session.execute(
+        db.update(model)
+        .where(model.id == target_id)
+        .values({
+            model.review_count: model.review_count + delta,
+            model.rating_sum: model.rating_sum + delta * rating,
+            bucket: bucket + delta,
+        })
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def record_review(review):
+    model, target_id = _target(review)
+    return apply_rating(model, target_id, review.rating)
+
+
+def rebuild_rating_stats():
+    """Recompute every aggregate from the reviews table, e.g. after
+    reviews were written without going through ReviewList.post."""
+    for model, column in ((Product, Review.product_id), (Service, Review.service_id)):
+        def total(expression):
+            return (
+                db.select(func.coalesce(func.sum(expression), 0))
+                .where(column == model.id)
+                .scalar_subquery()
+            )
+        values = {
+            model.review_count: total(1),
+            model.rating_sum: total(Review.rating),
+        }
+        for n in range(1, 6):
+            values[getattr(model, f"rating_{n}")] = total(case((Review.rating == n, 1), else_=0))
+        db.session.execute(db.update(model).values(values).execution_options(synchronize_session=False))
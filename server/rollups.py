@@ -0,0 +1,279 @@
+from collections import Counter
+from datetime import datetime, date, time, timedelta
+
+import click
+from sqlalchemy import event, inspect, func, cast, Date, distinct
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from listing import ListingError, date_arg, int_arg
+from models import (Order, OrderItem, DeliveryZone, Product,
+        SalesHourly, SalesDaily, ProductSalesDaily, ProductSalesMonthly, ZoneSalesDaily)
+
+
+# Orders count towards the rollups unless cancelled. Checkout adds an
+# order's figures and a status change into or out of "Cancelled" adds or
+# subtracts them, all computed by the same INSERT ... SELECT the backfill
+# uses, so the incremental and rebuilt tables cannot disagree.
+EXCLUDED_STATUSES = ("Cancelled",)
+
+
+def _buckets():
+    if db.engine.dialect.name == "postgresql":
+        return (func.date_trunc("hour", Order.created_at), cast(Order.created_at, Date),
+                cast(func.date_trunc("month", Order.created_at), Date))
+    #match SQLAlchemy's SQLite DateTime/Date storage formats so range filters compare correctly
+    return (func.strftime("%Y-%m-%d %H:00:00.000000", Order.created_at), func.date(Order.created_at),
+            func.strftime("%Y-%m-01", Order.created_at))
+
+
+def _rollups(sign=1):
+    """(table, select) pairs producing each rollup's rows for the orders
+    the caller filters in."""
+    hour, day, month = _buckets()
+    orders = func.count(distinct(Order.id)) * sign
+    units = func.coalesce(func.sum(OrderItem.quantity), 0) * sign
+    revenue = func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0) * sign
+    with_items = db.select().select_from(Order).outerjoin(OrderItem, OrderItem.order_id == Order.id)
+    return [
+        (SalesHourly, with_items.add_columns(hour, orders, units, revenue).group_by(hour)),
+        (SalesDaily, with_items.add_columns(day, orders, units, revenue).group_by(day)),
+        (ProductSalesDaily, db.select(day, OrderItem.product_id, orders, units, revenue)
+            .select_from(Order).join(OrderItem, OrderItem.order_id == Order.id)
+            .where(OrderItem.product_id.isnot(None))
+            .group_by(day, OrderItem.product_id)),
+        (ProductSalesMonthly, db.select(month, OrderItem.product_id, orders, units, revenue)
+            .select_from(Order).join(OrderItem, OrderItem.order_id == Order.id)
+            .where(OrderItem.product_id.isnot(None))
+            .group_by(month, OrderItem.product_id)),
+        (ZoneSalesDaily, with_items.add_columns(day, func.coalesce(Order.delivery_zone_id, 0), orders, revenue)
+            .group_by(day, func.coalesce(Order.delivery_zone_id, 0))),
+    ]
+
+
+def _insert(model):
+    return (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(model.__table__)
+
+
+def apply_orders(order_ids, sign=1):
+    """Add (sign=1) or subtract (sign=-1) these orders' figures."""
+    if not order_ids:
+        return
+    for model, select in _rollups(sign):
+        table = model.__table__
+        keys = [c.name for c in table.primary_key]
+        values = [c.name for c in table.columns if c.name not in keys]
+        insert = _insert(model)
+        db.session.execute(
+            insert.from_select(keys + values, select.where(Order.id.in_(order_ids)))
+            .on_conflict_do_update(
+                index_elements=keys,
+                set_={name: table.c[name] + insert.excluded[name] for name in values},
+            )
+        )
+
+
+def _counted(status):
+    return status is not None and status not in EXCLUDED_STATUSES
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_order_changes(session, flush_context):
+    changes = session.info.setdefault("rollup_orders", Counter())
+    for obj in session.new:
+        if isinstance(obj, Order) and _counted(obj.status):
+            changes[obj.id] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Order):
+            history = inspect(obj).attrs.status.history
+            if history.added and history.deleted:
+                changes[obj.id] += _counted(history.added[0]) - _counted(history.deleted[0])
+
+
+@event.listens_for(db.session, "before_flush")
+def _remove_deleted_orders(session, flush_context, instances):
+    #an order's items are gone once the flush runs, so subtract it first
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Order) and _counted(obj.status)]
+    if deleted:
+        apply_orders(deleted, sign=-1)
+
+
+@event.listens_for(db.session, "before_commit")
+def _apply_order_changes(session):
+    #order items are bulk-inserted after the order's own flush, so wait for commit
+    session.flush()
+    changes = session.info.pop("rollup_orders", None)
+    if not changes:
+        return
+    for sign in (1, -1):
+        apply_orders([order_id for order_id, delta in changes.items() if delta == sign], sign=sign)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_order_changes(session):
+    session.info.pop("rollup_orders", None)
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def backfill(start=None, end=None):
+    """Rebuild the rollups from scratch for the months covering
+    [start, end), or for all history."""
+    #whole months, so the monthly rows are never half rebuilt
+    start = datetime.combine(_month_start(start.date()), time.min) if start else None
+    end = datetime.combine(_next_month(end.date() - timedelta(days=1)), time.min) if end else None
+
+    columns = {SalesHourly: SalesHourly.hour, SalesDaily: SalesDaily.day, ProductSalesDaily: ProductSalesDaily.day,
+               ProductSalesMonthly: ProductSalesMonthly.month, ZoneSalesDaily: ZoneSalesDaily.day}
+    for model, column in columns.items():
+        bound = (lambda d: d) if model is SalesHourly else datetime.date
+        query = db.delete(model)
+        if start:
+            query = query.where(column >= bound(start))
+        if end:
+            query = query.where(column < bound(end))
+        db.session.execute(query)
+
+    _, day, _ = _buckets()
+    for model, select in _rollups():
+        table = model.__table__
+        select = select.where(Order.status.notin_(EXCLUDED_STATUSES))
+        #filter on the same day bucket the rows are grouped by
+        if start:
+            select = select.where(day >= start.date())
+        if end:
+            select = select.where(day < end.date())
+        db.session.execute(table.insert().from_select([c.name for c in table.columns], select))
+    db.session.info.pop("rollup_orders", None)
+    db.session.commit()
+
+
+@app.cli.group()
+def rollups():
+    """Sales rollup tables."""
+
+
+@rollups.command("backfill")
+@click.option("--from", "start", help="first day to rebuild (ISO date); default: all history")
+@click.option("--to", "end", help="last day to rebuild (ISO date, inclusive)")
+def backfill_command(start, end):
+    """Rebuild sales rollups from orders and order items."""
+    try:
+        start = date_arg({"from": start}, "from")
+        end = date_arg({"to": end}, "to", end=True)
+    except ListingError as e:
+        raise click.BadParameter(str(e))
+    backfill(start, end)
+    click.echo("Sales rollups rebuilt.")
+
+
+REPORT_LIMIT = 100
+
+
+def _range(args):
+    #defaults to the 30 days up to and including today
+    start, end = date_arg(args, "from"), date_arg(args, "to", end=True)
+    end = end or datetime.combine(date.today() + timedelta(days=1), time.min)
+    start = start or end - timedelta(days=30)
+    if start >= end:
+        raise ListingError("from must be before to")
+    return start, end
+
+
+def sales_report(args):
+    """Orders, units and revenue per hour or day in [from, to]."""
+    granularity = args.get("granularity", "day")
+    if granularity not in ("hour", "day"):
+        raise ListingError("granularity must be hour or day")
+    start, end = _range(args)
+    if granularity == "hour":
+        model, bucket = SalesHourly, SalesHourly.hour
+    else:
+        model, bucket, start, end = SalesDaily, SalesDaily.day, start.date(), end.date()
+    rows = db.session.execute(
+        db.select(bucket, model.orders, model.units, model.revenue)
+        .where(bucket >= start, bucket < end)
+        .order_by(bucket)
+    )
+    return [
+        {"bucket": b.isoformat(), "orders": orders, "units": units, "revenue": revenue}
+        for b, orders, units, revenue in rows
+    ]
+
+
+def _product_rows(start, end):
+    #whole months from the monthly table, the ragged edges from the daily one
+    first, last = start if start.day == 1 else _next_month(start), _month_start(end)
+    daily = (ProductSalesDaily.product_id, ProductSalesDaily.orders, ProductSalesDaily.units, ProductSalesDaily.revenue)
+    if first >= last:
+        return db.select(*daily).where(ProductSalesDaily.day >= start, ProductSalesDaily.day < end)
+    return db.union_all(
+        db.select(ProductSalesMonthly.product_id, ProductSalesMonthly.orders,
+                  ProductSalesMonthly.units, ProductSalesMonthly.revenue)
+        .where(ProductSalesMonthly.month >= first, ProductSalesMonthly.month < last),
+        db.select(*daily).where(ProductSalesDaily.day >= start, ProductSalesDaily.day < first),
+        db.select(*daily).where(ProductSalesDaily.day >= last, ProductSalesDaily.day < end),
+    )
+
+
+def product_report(args):
+    """Units and revenue per product over [from, to], best sellers first."""
+    start, end = _range(args)
+    limit = min(int_arg(args, "limit", 20, minimum=1), REPORT_LIMIT)
+    rows = _product_rows(start.date(), end.date()).subquery()
+    revenue = func.sum(rows.c.revenue).label("revenue")
+    top = (
+        db.select(rows.c.product_id, func.sum(rows.c.orders).label("orders"),
+                  func.sum(rows.c.units).label("units"), revenue)
+        .group_by(rows.c.product_id)
+        #cancellations leave zeroed rows behind
+        .having(func.sum(rows.c.orders) > 0)
+        .order_by(revenue.desc(), rows.c.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(top, Product.name).outerjoin(Product, Product.id == top.c.product_id)
+        .order_by(top.c.revenue.desc(), top.c.product_id)
+    )
+    return [
+        {"product_id": r.product_id, "name": r.name, "orders": r.orders, "units": r.units, "revenue": r.revenue}
+        for r in rows
+    ]
+
+
+def zone_report(args):
+    """Order volume and revenue per delivery zone over [from, to]."""
+    start, end = _range(args)
+    totals = (
+        db.select(ZoneSalesDaily.delivery_zone_id,
+                  func.sum(ZoneSalesDaily.orders).label("orders"),
+                  func.sum(ZoneSalesDaily.revenue).label("revenue"))
+        .where(ZoneSalesDaily.day >= start.date(), ZoneSalesDaily.day < end.date())
+        .group_by(ZoneSalesDaily.delivery_zone_id)
+        .having(func.sum(ZoneSalesDaily.orders) > 0)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(totals, DeliveryZone.zone_name)
+        .outerjoin(DeliveryZone, DeliveryZone.id == totals.c.delivery_zone_id)
+        .order_by(totals.c.orders.desc(), totals.c.delivery_zone_id)
+    )
+    return [
+        {"delivery_zone_id": r.delivery_zone_id or None, "zone_name": r.zone_name,
+         "orders": r.orders, "revenue": r.revenue}
+        for r in rows
+    ]
+
+
+REPORTS = {
+    "sales": sales_report,
+    "products": product_report,
+    "zones": zone_report,
+}
@@ -0,0 +1,111 @@
+import re
+
+from sqlalchemy import event, func, DDL, Table, Column, Integer, Float, MetaData
+
+from config import db
+from listing import ListingError, keyset_page, int_arg
+from loaders import eager
+from models import Product, Service
+
+
+# Full-text search over name and description. SQLite keeps an external
+# content FTS5 table per model in sync with triggers; Postgres uses a GIN
+# index over the same to_tsvector expression the search query filters on.
+
+MAX_TERMS = 8
+
+SEARCHABLE = {
+    "products": Product,
+    "services": Service,
+}
+
+_fts_metadata = MetaData()
+
+
+def _fts_table(table):
+    #only the columns queries touch; the table itself is created by DDL below
+    return Table(
+        f"{table}_fts", _fts_metadata,
+        Column("rowid", Integer),
+        Column(f"{table}_fts"),
+        Column("rank", Float),
+    )
+
+
+FTS_TABLES = {name: _fts_table(name) for name in SEARCHABLE}
+
+
+def _sqlite_ddl(table):
+    fts = f"{table}_fts"
+    insert = f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description);"
+    delete = f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"name, description, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        #stock and rating updates leave the index alone
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF name, description ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _document(model):
+    return func.to_tsvector("simple", func.coalesce(model.name, "") + " " + func.coalesce(model.description, ""))
+
+
+for _name, _model in SEARCHABLE.items():
+    for _statement in _sqlite_ddl(_name):
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+    event.listen(
+        _model.__table__, "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {_name}_fts").execute_if(dialect="sqlite"),
+    )
+    event.listen(
+        _model.__table__, "after_create",
+        DDL(
+            f"CREATE INDEX IF NOT EXISTS ix_{_name}_search ON {_name} USING gin "
+            f"(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')))"
+        ).execute_if(dialect="postgresql"),
+    )
+
+
+def search_terms(text):
+    terms = re.findall(r"\w+", text or "")[:MAX_TERMS]
+    if not terms:
+        raise ListingError("q must contain at least one word")
+    return terms
+
+
+def search_catalog(kind, args):
+    """Ranked, keyset-paginated search of products or services.
+
+    Every word in q must match the start of a word in the name or
+    description, so "dog sham" finds "Dog Shampoo". Also accepts
+    category_id, limit and cursor."""
+    model = SEARCHABLE.get(kind)
+    if model is None:
+        raise ListingError(f"type must be one of {sorted(SEARCHABLE)}")
+    terms = search_terms(args.get("q"))
+    query = model.query.options(*eager(model))
+
+    if db.engine.dialect.name == "sqlite":
+        fts = FTS_TABLES[kind]
+        #quoted terms keep FTS5 operators in user input from being parsed
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        query = query.join(fts, fts.c.rowid == model.id).filter(fts.c[f"{kind}_fts"].match(match))
+        #bm25 rank: lower is a better match
+        rank, descending = fts.c.rank, False
+    else:
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        document = _document(model)
+        query = query.filter(document.op("@@")(tsquery))
+        rank, descending = func.ts_rank(document, tsquery), True
+
+    category_id = int_arg(args, "category_id")
+    if category_id is not None:
+        query = query.filter(model.category_id == category_id)
+
+    return keyset_page(query, "rank", rank, model.id, args, descending=descending)
@@ -0,0 +1,169 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, inspect, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from listing import ListingError, date_arg, local_datetime
+from models import Service, Appointment, AppointmentSlot
+
+
+app.config.setdefault("APPOINTMENT_SLOT_RANGE_DAYS", 31)  # longest availability query
+
+# Appointments count against their slot unless cancelled. New bookings
+# go through book_slot, which claims the slot atomically; the session
+# events below release or move slots when existing appointments are
+# cancelled, rescheduled or deleted.
+RELEASED_STATUSES = ("Cancelled",)
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def _slot_length(service):
+    return timedelta(minutes=service.slot_minutes)
+
+
+def slot_starts(service, start, end):
+    """Every slot start for the service in [start, end)."""
+    day = start.date()
+    while datetime.combine(day, datetime.min.time()) < end:
+        opens = datetime.combine(day, datetime.min.time()) + timedelta(hours=service.opening_hour)
+        closes = datetime.combine(day, datetime.min.time()) + timedelta(hours=service.closing_hour)
+        slot = opens
+        while slot + _slot_length(service) <= closes:
+            if start <= slot < end:
+                yield slot
+            slot += _slot_length(service)
+        day += timedelta(days=1)
+
+
+def is_slot_start(service, value):
+    opens = datetime.combine(value.date(), datetime.min.time()) + timedelta(hours=service.opening_hour)
+    closes = datetime.combine(value.date(), datetime.min.time()) + timedelta(hours=service.closing_hour)
+    return opens <= value and value + _slot_length(service) <= closes \
+        and (value - opens) % _slot_length(service) == timedelta(0)
+
+
+def open_slots(service, args):
+    """Slots with room left between from and to (default: the next 7 days)."""
+    start = date_arg(args, "from", parse=local_datetime)
+    end = date_arg(args, "to", end=True, parse=local_datetime)
+    now = datetime.now()
+    start = max(start or now, now)
+    end = end or start + timedelta(days=7)
+    if start >= end:
+        raise ListingError("from must be before to")
+    if end - start > timedelta(days=app.config["APPOINTMENT_SLOT_RANGE_DAYS"]):
+        raise ListingError(f"range must be at most {app.config['APPOINTMENT_SLOT_RANGE_DAYS']} days")
+
+    booked = dict(db.session.execute(
+        db.select(AppointmentSlot.starts_at, AppointmentSlot.booked).where(
+            AppointmentSlot.service_id == service.id,
+            AppointmentSlot.starts_at >= start,
+            AppointmentSlot.starts_at < end,
+        )
+    ).all())
+    slots = []
+    for slot in slot_starts(service, start, end):
+        available = service.slot_capacity - booked.get(slot, 0)
+        if available > 0:
+            slots.append({"starts_at": slot.isoformat(), "ends_at": (slot + _slot_length(service)).isoformat(),
+                          "available": available})
+    return slots
+
+
+def _insert():
+    return (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(AppointmentSlot.__table__)
+
+
+def book_slot(service, starts_at):
+    """Claim one place in the slot or raise SlotUnavailable.
+
+    The increment is a single conditional UPDATE (booked < capacity), so
+    concurrent bookings can never overfill a slot. The caller adds the
+    appointment and commits, or rolls back on error."""
+    if not is_slot_start(service, starts_at):
+        raise SlotUnavailable("Not a bookable slot for this service")
+    db.session.execute(
+        _insert().values(service_id=service.id, starts_at=starts_at, booked=0)
+        .on_conflict_do_nothing(index_elements=["service_id", "starts_at"])
+    )
+    result = db.session.execute(
+        db.update(AppointmentSlot)
+        .where(AppointmentSlot.service_id == service.id, AppointmentSlot.starts_at == starts_at,
+               AppointmentSlot.booked < service.slot_capacity)
+        .values(booked=AppointmentSlot.booked + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise SlotUnavailable("This slot is fully booked")
+
+
+def _counted(status):
+    return status not in RELEASED_STATUSES
+
+
+def _values(obj, key):
+    history = inspect(obj).attrs[key].history
+    new = history.added[0] if history.added else (history.unchanged[0] if history.unchanged else None)
+    old = history.deleted[0] if history.deleted else (None if history.added else new)
+    return old, new
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_slot_changes(session, flush_context):
+    changes = session.info.setdefault("slot_changes", Counter())
+    for obj in session.dirty:
+        if isinstance(obj, Appointment):
+            old_date, new_date = _values(obj, "appointment_date")
+            old_status, new_status = _values(obj, "payment_status")
+            changes[(obj.service_id, old_date)] -= _counted(old_status)
+            changes[(obj.service_id, new_date)] += _counted(new_status)
+    for obj in session.deleted:
+        if isinstance(obj, Appointment) and _counted(obj.payment_status):
+            changes[(obj.service_id, obj.appointment_date)] -= 1
+
+
+#make the old value available to after_flush even when the attribute was
+#expired before being overwritten
+for _attribute in (Appointment.appointment_date, Appointment.payment_status):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+@event.listens_for(db.session, "before_commit")
+def _apply_slot_changes(session):
+    session.flush()
+    changes = session.info.pop("slot_changes", None)
+    if not changes:
+        return
+    rows = [{"service_id": service_id, "starts_at": starts_at, "booked": delta}
+            for (service_id, starts_at), delta in changes.items() if delta and starts_at is not None]
+    if rows:
+        insert = _insert()
+        session.execute(insert.on_conflict_do_update(
+            index_elements=["service_id", "starts_at"],
+            set_={"booked": AppointmentSlot.__table__.c.booked + insert.excluded.booked},
+        ), rows)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_slot_changes(session):
+    session.info.pop("slot_changes", None)
+
+
+def rebuild_slots():
+    """Recount appointment_slots from the appointments table, e.g. after
+    appointments were inserted without book_slot."""
+    db.session.execute(db.delete(AppointmentSlot))
+    db.session.execute(AppointmentSlot.__table__.insert().from_select(
+        ["service_id", "starts_at", "booked"],
+        db.select(Appointment.service_id, Appointment.appointment_date, func.count())
+        .where(Appointment.payment_status.notin_(RELEASED_STATUSES) | Appointment.payment_status.is_(None))
+        .group_by(Appointment.service_id, Appointment.appointment_date),
+    ))
+    db.session.info.pop("slot_changes", None)
+    db.session.commit()
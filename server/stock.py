@@ -0,0 +1,75 @@
+from sqlalchemy import case, inspect
+
+from config import db
+from models import Product
+from inventory_alerts import stock_changed
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, name=None):
+        self.product_id = product_id
+        self.name = name
+        super().__init__(f"Insufficient stock for {name or 'Unknown'}")
+
+
+def reserve_stock(lines):
+    """Decrement stock for every {product_id: quantity} line or raise.
+
+    All lines go out as one conditional UPDATE
+    (stock_quantity >= quantity per row), so concurrent checkouts can never
+    drive stock below zero. On InsufficientStock the caller must roll back,
+    since the rows that did match have already been decremented."""
+    if not lines:
+        return
+    for product_id, quantity in lines.items():
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+            raise ValueError(f"Invalid quantity for product {product_id}")
+
+    product_ids = sorted(lines)
+    if db.session.get_bind().dialect.name != "sqlite":
+        #take row locks in id order so two carts never wait on each other
+        db.session.execute(
+            db.select(Product.id).where(Product.id.in_(product_ids))
+            .order_by(Product.id).with_for_update()
+        )
+
+    quantity = case(lines, value=Product.id)
+    statement = (
+        db.update(Product)
+        .where(Product.id.in_(product_ids), Product.stock_quantity >= quantity)
+        .values(stock_quantity=Product.stock_quantity - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    returning = db.session.get_bind().dialect.update_returning
+    if returning:
+        statement = statement.returning(Product.id)
+    result = db.session.execute(statement)
+    updated = set(result.scalars()) if returning else None
+
+    #the Core UPDATE bypasses the session events that queue alert evaluation
+    stock_changed(db.session, product_ids)
+
+    #loaded products now hold stale counts
+    for obj in db.session.identity_map.values():
+        if isinstance(obj, Product) and obj.id in lines and not inspect(obj).expired:
+            db.session.expire(obj, ["stock_quantity"])
+
+    if updated is not None and len(updated) == len(product_ids):
+        return
+    if updated is None and result.rowcount == len(product_ids):
+        return
+
+    rows = {
+        row.id: row for row in db.session.execute(
+            db.select(Product.id, Product.name, Product.stock_quantity).where(Product.id.in_(product_ids))
+        )
+    }
+    for product_id in product_ids:
+        if updated is not None and product_id in updated:
+            continue
+        row = rows.get(product_id)
+        if row is None:
+            raise InsufficientStock(product_id)
+        if updated is not None or (row.stock_quantity or 0) < lines[product_id]:
+            raise InsufficientStock(product_id, row.name)
+    raise InsufficientStock(product_ids[0])
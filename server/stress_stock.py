@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/vetty_stress_stock.db")
+
+from sqlalchemy.exc import OperationalError
+
+from config import app, db
+from models import Product
+from stock import reserve_stock, InsufficientStock
+
+# Hammers reserve_stock() from many threads with two-line carts in random
+# order and checks that stock never went below zero and matches the number
+# of successful reservations.
+# Usage: python stress_stock.py [threads] [attempts_per_thread] [initial_stock]
+
+
+def worker(product_ids, attempts, counts, lock):
+    for _ in range(attempts):
+        lines = dict.fromkeys(random.sample(product_ids, len(product_ids)), 1)
+        with app.app_context():
+            try:
+                reserve_stock(lines)
+                db.session.commit()
+                outcome = "reserved"
+            except InsufficientStock:
+                db.session.rollback()
+                outcome = "rejected"
+            except OperationalError:
+                #sqlite gives up with "database is locked" after its busy timeout
+                db.session.rollback()
+                outcome = "busy"
+        with lock:
+            counts[outcome] += 1
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    attempts = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    initial_stock = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    with app.app_context():
+        db.create_all()
+        products = [Product(name=f"stress-{i}", price=1, stock_quantity=initial_stock) for i in range(2)]
+        db.session.add_all(products)
+        db.session.commit()
+        product_ids = [p.id for p in products]
+
+    counts, lock = Counter(), threading.Lock()
+    pool = [threading.Thread(target=worker, args=(product_ids, attempts, counts, lock)) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    with app.app_context():
+        stock = [db.session.get(Product, pid).stock_quantity for pid in product_ids]
+        Product.query.filter(Product.id.in_(product_ids)).delete()
+        db.session.commit()
+
+    print(f"attempts={threads * attempts} {dict(counts)} final_stock={stock}")
+    assert all(s == initial_stock - counts["reserved"] for s in stock), "stock does not match reservations"
+    assert all(s >= 0 for s in stock), "oversold"
+    print("OK: no oversell")
@@ -0,0 +1,224 @@
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from config import app, db
+from dashboard import reconcile_counters
+from hashing import hasher
+from inventory_alerts import evaluate_products
+from models import (Role, User, DeliveryZone, Category, Product, InventoryAlert, Service, Review,
+        Order, OrderItem, OrderStatusHistory, Payment, Appointment)
+from ratings import rebuild_rating_stats
+from rollups import backfill
+from slots import rebuild_slots, slot_starts
+
+# Fills the database with a deterministic synthetic shop using bulk
+# INSERTs, then rebuilds every derived table (ratings, rollups, slots,
+# inventory alerts, dashboard counters) the way production keeps them.
+# Every user's password is PASSWORD; user 1 ("admin") is the admin.
+# Usage: DATABASE_URL=... python synthetic_data.py [--scale small|medium|large] [--products N ...] [--seed 7]
+
+PASSWORD = "synthetic-password"
+
+SCALES = {
+    "small": {"users": 200, "categories": 10, "products": 1000, "services": 20,
+              "reviews": 2000, "orders": 2000, "appointments": 500},
+    "medium": {"users": 2000, "categories": 30, "products": 20000, "services": 60,
+               "reviews": 40000, "orders": 40000, "appointments": 5000},
+    "large": {"users": 20000, "categories": 60, "products": 200000, "services": 200,
+              "reviews": 400000, "orders": 400000, "appointments": 50000},
+}
+
+CHUNK_SIZE = 5000
+
+WORDS = ("dog cat puppy kitten bird fish rabbit leash collar bowl bed toy chew treat food shampoo "
+         "brush harness crate litter scratcher aquarium filter vitamin flea tick").split()
+ADJECTIVES = "organic premium small large soft durable gentle natural steel plush".split()
+SERVICES = ("grooming", "vaccination", "dental cleaning", "checkup", "nail trim", "deworming",
+            "microchipping", "boarding", "training session", "x-ray")
+COMMENTS = ("Great quality", "My dog loves it", "Arrived late", "Would buy again", "Not worth the price",
+            "Friendly staff", "Exactly as described", "Too small", "Excellent service", "")
+ORDER_STATUSES = ("Pending", "Approved", "Out for Delivery", "Delivered", "Delivered", "Delivered", "Cancelled")
+
+
+def _insert(model, rows):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        db.session.execute(db.insert(model), chunk)
+
+
+def _reset_sequences():
+    #explicit ids do not advance Postgres sequences
+    if db.engine.dialect.name != "postgresql":
+        return
+    for table in db.metadata.sorted_tables:
+        if "id" in table.c and table.c.id.autoincrement is not False and table.c.id.primary_key:
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def _name(rng):
+    return f"{rng.choice(ADJECTIVES)} {rng.choice(WORDS)} {rng.choice(WORDS)}".title()
+
+
+def generate(counts, seed=7):
+    """Drop and recreate every table, then fill them according to counts
+    (see SCALES). Returns the row counts written."""
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    db.drop_all()
+    db.create_all()
+
+    _insert(Role, [{"id": 1, "name": "Admin"}, {"id": 2, "name": "Customer"}])
+    password_hash = hasher.hash(PASSWORD)
+    _insert(User, (
+        {"id": i, "username": "admin" if i == 1 else f"user{i}", "email": f"user{i}@vetty.test",
+         "_password_hash": password_hash, "role_id": 1 if i == 1 else 2}
+        for i in range(1, counts["users"] + 1)
+    ))
+    zones = 5
+    _insert(DeliveryZone, [{"id": i, "zone_name": f"Zone {i}", "delivery_fee": 50 * i} for i in range(1, zones + 1)])
+
+    product_categories = list(range(1, counts["categories"] // 2 + 1))
+    service_categories = list(range(len(product_categories) + 1, counts["categories"] + 1))
+    _insert(Category, [{"id": i, "name": f"Category {i}", "category_type": "Product" if i in product_categories else "Service"}
+                       for i in product_categories + service_categories])
+
+    prices = {}
+    products = []
+    for i in range(1, counts["products"] + 1):
+        prices[i] = rng.randint(50, 5000)
+        products.append({
+            "id": i, "name": _name(rng), "description": " ".join(rng.choices(WORDS + ADJECTIVES, k=12)),
+            "price": prices[i], "stock_quantity": rng.randint(0, 8) if rng.random() < 0.05 else rng.randint(20, 500),
+            "category_id": rng.choice(product_categories),
+        })
+    _insert(Product, products)
+    del products
+    _insert(InventoryAlert, (
+        {"product_id": i, "threshold": rng.choice((5, 10, 20))}
+        for i in rng.sample(range(1, counts["products"] + 1), counts["products"] // 20)
+    ))
+
+    services = [
+        {"id": i, "name": f"{rng.choice(ADJECTIVES).title()} {rng.choice(SERVICES)}",
+         "description": " ".join(rng.choices(WORDS, k=10)), "base_price": rng.randint(500, 8000),
+         "category_id": rng.choice(service_categories), "slot_minutes": rng.choice((30, 45, 60, 90)),
+         "slot_capacity": rng.choice((1, 1, 2, 3)), "opening_hour": 8, "closing_hour": 18}
+        for i in range(1, counts["services"] + 1)
+    ]
+    _insert(Service, services)
+
+    customers = range(2, counts["users"] + 1)
+    _insert(Review, (
+        {"user_id": rng.choice(customers), "comment": rng.choice(COMMENTS),
+         "rating": rng.choices((1, 2, 3, 4, 5), weights=(1, 1, 2, 4, 6))[0],
+         **({"product_id": rng.randint(1, counts["products"]), "service_id": None} if rng.random() < 0.8
+            else {"product_id": None, "service_id": rng.randint(1, counts["services"])})}
+        for _ in range(counts["reviews"])
+    ))
+
+    orders, items, history, payments = [], [], [], []
+    for order_id in range(1, counts["orders"] + 1):
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        status = rng.choice(ORDER_STATUSES)
+        orders.append({"id": order_id, "user_id": rng.choice(customers), "status": status, "created_at": created_at,
+                       "delivery_zone_id": rng.choice((None, *range(1, zones + 1)))})
+        history.append({"order_id": order_id, "status": status, "changed_at": created_at})
+        total = 0
+        for product_id in rng.sample(range(1, counts["products"] + 1), min(rng.randint(1, 4), counts["products"])):
+            quantity = rng.randint(1, 3)
+            total += quantity * prices[product_id]
+            items.append({"order_id": order_id, "product_id": product_id, "quantity": quantity,
+                          "unit_price": prices[product_id]})
+        if rng.random() < 0.6:
+            payment_status = "pending" if status == "Pending" else rng.choice(("success", "success", "success", "fail"))
+            payments.append({
+                "user_id": orders[-1]["user_id"], "order_id": order_id, "payment_method": "M-Pesa", "amount": total,
+                "status": payment_status, "checkout_request_id": f"ws_CO_SYN{order_id:09d}",
+                "phone_number": f"2547{rng.randint(0, 99999999):08d}",
+                "mpesa_receipt_number": f"SYN{order_id:09d}" if payment_status == "success" else None,
+                "paid_at": created_at + timedelta(minutes=rng.randint(1, 30)),
+            })
+        if len(items) >= CHUNK_SIZE:
+            _insert(Order, orders)
+            _insert(OrderItem, items)
+            _insert(OrderStatusHistory, history)
+            _insert(Payment, payments)
+            orders, items, history, payments = [], [], [], []
+    _insert(Order, orders)
+    _insert(OrderItem, items)
+    _insert(OrderStatusHistory, history)
+    _insert(Payment, payments)
+
+    #half in the past month, half over the coming month, on each service's slot grid
+    service_slots = {
+        s["id"]: list(slot_starts(Service(**{k: s[k] for k in ("slot_minutes", "opening_hour", "closing_hour")}),
+                                  now - timedelta(days=30), now + timedelta(days=30)))
+        for s in services
+    }
+    capacity = {s["id"]: s["slot_capacity"] for s in services}
+    booked = {}
+    appointments = []
+    for _ in range(counts["appointments"]):
+        service_id = rng.randint(1, counts["services"])
+        starts_at = rng.choice(service_slots[service_id])
+        if booked.get((service_id, starts_at), 0) >= capacity[service_id]:
+            continue
+        booked[(service_id, starts_at)] = booked.get((service_id, starts_at), 0) + 1
+        appointments.append({
+            "user_id": rng.choice(customers), "service_id": service_id, "appointment_date": starts_at,
+            "payment_status": "Completed" if starts_at < now else "Scheduled",
+            "total_price": services[service_id - 1]["base_price"],
+        })
+    _insert(Appointment, appointments)
+    _reset_sequences()
+    db.session.commit()
+
+    #derived tables, rebuilt the way their modules document
+    rebuild_rating_stats()
+    db.session.commit()
+    backfill()
+    rebuild_slots()
+    for start in range(1, counts["products"] + 1, CHUNK_SIZE):
+        evaluate_products(range(start, min(start + CHUNK_SIZE, counts["products"] + 1)))
+    db.session.commit()
+    reconcile_counters()
+    return {**counts, "appointments": len(appointments)}
+
+
+def add_arguments(parser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=7)
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name}", type=int, help=f"override the scale's number of {name}")
+
+
+def counts_from(parser, args):
+    counts = dict(SCALES[args.scale])
+    counts.update({name: getattr(args, name) for name in counts if getattr(args, name) is not None})
+    if counts["users"] < 2 or counts["categories"] < 2 or counts["products"] < 1 or counts["services"] < 1:
+        parser.error("need at least 2 users, 2 categories, 1 product and 1 service")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset. Every table is dropped first.")
+    add_arguments(parser)
+    args = parser.parse_args()
+    counts = counts_from(parser, args)
+    if "DATABASE_URL" not in os.environ:
+        #never wipe the default development database by accident
+        parser.error("set DATABASE_URL to the database to overwrite")
+    with app.app_context():
+        start = time.perf_counter()
+        written = generate(counts, args.seed)
+    print(f"generated {written} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import db
+from models import TableVersion
+
+
+# Every committed transaction bumps table_versions for the versioned
+# tables it wrote, in the same transaction, so all workers agree on the
+# version. Only tables that conditional GETs depend on are versioned:
+# bumping a row for every orders or cart_items write would serialize all
+# writers on a few hot rows for nothing. Other writes are still collected
+# in session.info["changed_tables"] for cache invalidation. Tables behind
+# cache.cached() namespaces are versioned too, as the cache key carries
+# their stamp.
+VERSIONED_TABLES = frozenset((
+    "categories", "products", "services", "inventory_alerts", "reviews", "users", "delivery_zones",
+))
+
+
+@event.listens_for(db.session, "after_flush")
+def _collect_changed_tables(session, flush_context):
+    tables = session.info.setdefault("changed_tables", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tables.add(obj.__tablename__)
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    #bulk UPDATE/DELETE statements bypass the unit of work
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and table.name != TableVersion.__tablename__:
+            tables = orm_execute_state.session.info.setdefault("changed_tables", set())
+            tables.add(table.name)
+
+
+@event.listens_for(db.session, "before_commit")
+def _bump_table_versions(session):
+    session.flush()
+    #in a fixed order, so two writers never deadlock
+    tables = sorted(session.info.get("changed_tables", set()) & VERSIONED_TABLES)
+    if not tables:
+        return
+    now = datetime.now(timezone.utc)
+    #an upsert, so two transactions creating the same row cannot race
+    insert = (postgresql.insert if session.get_bind().dialect.name == "postgresql" else sqlite.insert)(
+        TableVersion.__table__)
+    session.execute(
+        insert.on_conflict_do_update(
+            index_elements=["table_name"],
+            set_={"version": TableVersion.__table__.c.version + 1, "updated_at": insert.excluded.updated_at},
+        ),
+        [{"table_name": name, "version": 1, "updated_at": now} for name in tables],
+    )
+
+
+@event.listens_for(db.session, "after_rollback")
+def _forget_changed_tables(session):
+    session.info.pop("changed_tables", None)
+
+
+def table_versions(*tables):
+    """Return {table_name: (version, updated_at)} in one query, read once
+    per request for a given set of tables."""
+    #kept on the request rather than g, which outlives it under an outer app context
+    memo = request.environ.setdefault("vetty.table_versions", {}) if has_request_context() else {}
+    key = frozenset(tables)
+    if key not in memo:
+        rows = db.session.execute(
+            db.select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+            .where(TableVersion.table_name.in_(tables))
+        )
+        versions = {name: (0, None) for name in tables}
+        versions.update({name: (version, updated_at) for name, version, updated_at in rows})
+        memo[key] = versions
+    return memo[key]
+
+
+def version_stamp(versions):
+    return ",".join(f"{name}:{versions[name][0]}" for name in sorted(versions))